@@ -21,9 +21,11 @@ from mykobo_py.identity.identity import IdentityServiceClient
 from mykobo_py.wallets.wallets import WalletServiceClient
 from mykobo_py.message_bus.sqs.SQS import SQS
 from app.database import init_app as init_database
+from app.json_provider import OrjsonProvider
 
 def create_app(env):
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     if env in ["development", "local"]:
         load_dotenv(find_dotenv())
 
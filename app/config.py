@@ -23,6 +23,19 @@ class Config(object):
     NOTIFICATIONS_QUEUE_NAME = os.environ.get("NOTIFICATIONS_QUEUE_NAME")
     PAYMENTS_QUEUE_NAME = os.environ.get("PAYMENTS_QUEUE_NAME")
     CORRECTION_QUEUE_NAME = os.environ.get("CORRECTION_QUEUE_NAME")
+    # Days processed inbox rows are kept. Their message_ids deduplicate
+    # redeliveries, so this must outlast the queue's own redelivery window
+    # (SQS keeps messages for up to 14 days); shorter values are raised to 14.
+    # A message redelivered after its row was purged is still harmless: paid
+    # out transactions are never reserved or moved back to PENDING_ANCHOR.
+    INBOX_RETENTION_DAYS = int(os.environ.get("INBOX_RETENTION_DAYS", "30"))
+    # Queue requests the retry worker keeps in flight at once
+    RETRY_CONCURRENCY = int(os.environ.get("RETRY_CONCURRENCY", "8"))
+    # Rate limit counters. Fixed windows keep one counter per client and limit
+    # (O(1) per request); point the storage at Redis to share limits between
+    # gunicorn workers, e.g. redis://host:6379
+    RATELIMIT_STRATEGY = os.environ.get("RATELIMIT_STRATEGY", "fixed-window")
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI", "memory://")
 
     # Solana configuration
     SOLANA_RPC_URL = os.environ.get("SOLANA_RPC_URL")
@@ -31,11 +44,29 @@ class Config(object):
     SOLANA_RECEIVABLES_ADDRESS = os.environ.get("SOLANA_RECEIVABLES_ADDRESS")
     USDC_TOKEN_MINT = os.environ.get("USDC_TOKEN_MINT", "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v")  # USDC mainnet mint
     EURC_TOKEN_MINT = os.environ.get("EURC_TOKEN_MINT", "HzwqbKZw8HxMN6bF2yFZNrht3c2iXXzpKcFu7uBEDKtr")  # USDC mainnet mint
+    # Withdrawals packed into a single Solana transaction by the transaction processor
+    SOLANA_MAX_TRANSFERS_PER_TX = int(os.environ.get("SOLANA_MAX_TRANSFERS_PER_TX", "1"))
+    # Solana transfers the transaction processor sends concurrently
+    SOLANA_MAX_CONCURRENT_TRANSFERS = int(os.environ.get("SOLANA_MAX_CONCURRENT_TRANSFERS", "8"))
 
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+    # Keep warm connections for the polling processes. Only PostgreSQL gets the
+    # QueuePool sizing; SQLite (used in tests) rejects the overflow options.
+    # values_plus_batch also sends executemany UPDATEs (e.g. inbox failures) as
+    # psycopg2 batches instead of one round trip per row.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "5")),
+        "executemany_mode": "values_plus_batch",
+        "insertmanyvalues_page_size": 1000,
+        "executemany_batch_page_size": 500,
+    } if (SQLALCHEMY_DATABASE_URI or "").startswith("postgres") else {}
 
 class Development(Config):
     LOGLEVEL = os.environ.get("LOGLEVEL", "DEBUG")
@@ -1,10 +1,24 @@
-from functools import wraps
+import time
+from functools import lru_cache, wraps
 from flask import request, jsonify, current_app, make_response, render_template, redirect, url_for
 import jwt
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=8192)
+def _decode_token(token: str, secret_key: str) -> dict:
+    """
+    Verify and decode an HS256 JWT, caching the payload of valid tokens.
+
+    Clients send the same token on every request, so repeat requests skip the
+    HMAC and JSON parsing. Invalid tokens raise and are never cached. A cached
+    payload can expire later, so callers must re-check its exp claim.
+    """
+    return jwt.decode(token, secret_key, algorithms=['HS256'])
+
+
 def require_wallet_auth(f):
     """
     Decorator to protect routes requiring wallet authentication.
@@ -48,12 +62,11 @@ def require_wallet_auth(f):
 
         try:
             # Verify JWT token
-            payload = jwt.decode(
-                token,
-                current_app.config['SECRET_KEY'],
-                algorithms=['HS256'],
-                verify=True
-            )
+            payload = _decode_token(token, current_app.config['SECRET_KEY'])
+
+            # The payload may come from the cache, after its token expired
+            if 'exp' in payload and payload['exp'] <= time.time():
+                raise jwt.ExpiredSignatureError("Signature has expired")
 
             # Check if wallet_address is in payload
             if 'wallet_address' not in payload:
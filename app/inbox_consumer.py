@@ -13,7 +13,6 @@ import sys
 from typing import Dict, Any
 from flask import Flask
 from requests import HTTPError
-from sqlalchemy.exc import IntegrityError
 from app.database import db
 from app.models import Inbox
 
@@ -169,37 +168,25 @@ class InboxConsumer:
         """
         with self.app.app_context():
             try:
-                # Check if message already exists (idempotency)
-                existing = Inbox.query.filter_by(message_id=message_id).first()
-
-                if existing:
-                    self.logger.info(
-                        f"Message {message_id} already exists in inbox (id={existing.id}), "
-                        f"skipping duplicate"
-                    )
-                    return
-
-                # Create inbox record
-                inbox_message = Inbox.from_sqs_message(
+                # Duplicates (SQS redelivery) are dropped by the unique message_id
+                inbox_id = Inbox.insert_if_new(
                     message_id=message_id,
                     message_body=message_body,
                     receipt_handle=receipt_handle
                 )
-
-                db.session.add(inbox_message)
                 db.session.commit()
 
+                if inbox_id is None:
+                    self.logger.info(
+                        f"Message {message_id} already exists in inbox, skipping duplicate"
+                    )
+                    return
+
                 self.logger.info(
-                    f"Stored message in inbox: id={inbox_message.id}, "
-                    f"reference={inbox_message.transaction_reference}"
+                    f"Stored message in inbox: id={inbox_id}, "
+                    f"reference={message_body.get('reference')}"
                 )
 
-            except IntegrityError as e:
-                # Handle race condition where message was inserted by another process
-                db.session.rollback()
-                self.logger.warning(
-                    f"Message {message_id} was already inserted by another process"
-                )
             except Exception as e:
                 db.session.rollback()
                 self.logger.exception(f"Error storing message in inbox: {e}")
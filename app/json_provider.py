@@ -0,0 +1,47 @@
+"""
+orjson-backed JSON provider for the Flask application.
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Serialize request and response bodies with orjson.
+
+    The output matches Flask's default provider: keys are sorted, dates and
+    datetimes are passed to Flask's default handler (HTTP date strings), as
+    are dataclasses and Decimals, and responses are indented in debug mode.
+    """
+
+    option = (
+        orjson.OPT_SORT_KEYS
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string, using json.dumps for custom arguments."""
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes."""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the given arguments as a JSON response."""
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option) + b"\n",
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,149 @@
+"""
+Helpers for publishing messages to the message bus.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Tuple
+
+# SQS accepts at most 10 entries per SendMessageBatch call
+MAX_BATCH_SIZE = 10
+
+
+def _send_chunk(message_bus, chunk: List[Any], queue_name: str, source: str, batched: bool):
+    """
+    Send one chunk of messages and split the outcome into sent and failed.
+
+    Args:
+        message_bus: Message bus client
+        chunk: Messages to send; a single message when not batched
+        queue_name: Target queue name
+        source: Source identifier passed through to the bus
+        batched: Whether to use the bus's native batch send
+
+    Returns:
+        Tuple of (sent, failed) lists for the chunk
+    """
+    sent = []
+    failed = []
+
+    if not batched:
+        for message in chunk:
+            try:
+                response = message_bus.send_message(message, queue_name, source)
+                sent.append((message, (response or {}).get('MessageId')))
+            except Exception as e:
+                failed.append((message, e))
+        return sent, failed
+
+    response = message_bus.send_message_batch(chunk, queue_name, source) or {}
+    # Entries are identified by their index within the chunk. The response
+    # isn't trusted to cover every entry: a message it doesn't confirm is
+    # reported failed, so it is resent (consumers deduplicate by idempotency
+    # key) rather than silently lost.
+    message_ids = {}
+    errors = {}
+    for success in response.get('Successful') or []:
+        index = _entry_index(success, len(chunk))
+        if index is not None:
+            message_ids[index] = success.get('MessageId')
+    for failure in response.get('Failed') or []:
+        index = _entry_index(failure, len(chunk))
+        if index is not None:
+            errors[index] = Exception(failure.get('Message') or failure.get('Code') or 'Batch send failed')
+
+    for index, message in enumerate(chunk):
+        if index in message_ids and index not in errors:
+            sent.append((message, message_ids[index]))
+        else:
+            failed.append((message, errors.get(index) or Exception('Not confirmed by the batch send')))
+    return sent, failed
+
+
+def _entry_index(entry, size: int):
+    """
+    Return the chunk index a batch response entry refers to.
+
+    Args:
+        entry: Entry of the response's Successful or Failed list
+        size: Number of messages in the chunk
+
+    Returns:
+        The index, or None if the entry's Id isn't a valid index
+    """
+    try:
+        index = int(entry['Id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return index if 0 <= index < size else None
+
+
+def publish_messages(
+        message_bus,
+        messages: List[Any],
+        queue_name: str,
+        source: str,
+        max_workers: int = 1
+) -> Tuple[List[Tuple[Any, str]], List[Tuple[Any, Exception]]]:
+    """
+    Send messages to a queue, up to MAX_BATCH_SIZE per request.
+
+    Uses the bus's native batch send when the client provides one and falls
+    back to sending the messages one at a time otherwise. With max_workers
+    above 1 the requests are issued concurrently from a thread pool.
+
+    Args:
+        message_bus: Message bus client (e.g. the SQS wrapper)
+        messages: Messages to send
+        queue_name: Target queue name
+        source: Source identifier passed through to the bus
+        max_workers: Maximum number of requests in flight at once
+
+    Returns:
+        Tuple of (sent, failed): (message, message_id) tuples for the messages
+        that were sent and (message, error) tuples for those that were not
+    """
+    # Looked up on the class so that only a real batch implementation is used
+    batched = getattr(type(message_bus), 'send_message_batch', None) is not None
+    size = MAX_BATCH_SIZE if batched else 1
+    chunks = [messages[start:start + size] for start in range(0, len(messages), size)]
+
+    def send(chunk):
+        try:
+            return _send_chunk(message_bus, chunk, queue_name, source, batched)
+        except Exception as e:
+            # A request that raised fails its own chunk, not the whole publish
+            return [], [(message, e) for message in chunk]
+
+    if max_workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            outcomes = list(executor.map(send, chunks))
+    else:
+        outcomes = [send(chunk) for chunk in chunks]
+
+    sent = []
+    failed = []
+    for chunk_sent, chunk_failed in outcomes:
+        sent.extend(chunk_sent)
+        failed.extend(chunk_failed)
+    return sent, failed
+
+
+def send_message_batch(
+        message_bus,
+        messages: List[Any],
+        queue_name: str,
+        source: str
+) -> List[Tuple[Any, Exception]]:
+    """
+    Send messages to a queue, up to MAX_BATCH_SIZE per request.
+
+    Args:
+        message_bus: Message bus client (e.g. the SQS wrapper)
+        messages: Messages to send
+        queue_name: Target queue name
+        source: Source identifier passed through to the bus
+
+    Returns:
+        List of (message, error) tuples for the messages that were not sent
+    """
+    _, failed = publish_messages(message_bus, messages, queue_name, source)
+    return failed
@@ -1,5 +1,6 @@
 import secrets
 import time
+from functools import lru_cache
 from datetime import datetime, UTC, timedelta
 from typing import Dict, Optional
 
@@ -7,10 +8,12 @@ import jwt
 from flask import session, Blueprint, request, jsonify, current_app, make_response
 from nacl.signing import VerifyKey
 from nacl.encoding import Base64Encoder
-import base64
+import binascii
+import hmac
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-import base58
+from solders.pubkey import Pubkey
+from sqlalchemy import delete
 
 from app.database import db
 from app.models import Nonce
@@ -23,6 +26,13 @@ limiter = Limiter(
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 TTL_IN_SECONDS = 300 # 5 minutes
+NONCE_CLEANUP_INTERVAL = 60 # seconds between cleanups triggered by requests
+# Fixed part of the challenge message; only the nonce and timestamp vary
+CHALLENGE_MESSAGE_PREFIX = "Sign this message to authenticate with MYKOBO DAPP.\n\nNonce: "
+
+def _challenge_message(nonce: str, timestamp: int) -> str:
+    """Build the message a wallet signs for the given nonce and timestamp."""
+    return f"{CHALLENGE_MESSAGE_PREFIX}{nonce}\nTimestamp: {timestamp}"
 
 def generate_auth_challenge(wallet_address: str, ttl_in_seconds: int = TTL_IN_SECONDS) -> Dict[str, str]:
     """
@@ -52,7 +62,7 @@ def generate_auth_challenge(wallet_address: str, ttl_in_seconds: int = TTL_IN_SE
     db.session.commit()
 
     # Message to sign - includes timestamp to prevent replay attacks
-    message = f"Sign this message to authenticate with MYKOBO DAPP.\n\nNonce: {nonce_value}\nTimestamp: {timestamp}"
+    message = _challenge_message(nonce_value, timestamp)
 
     return {
         'nonce': nonce_value,
@@ -60,6 +70,79 @@ def generate_auth_challenge(wallet_address: str, ttl_in_seconds: int = TTL_IN_SE
         'timestamp': timestamp
     }
 
+@lru_cache(maxsize=4096)
+def _solana_verify_key(wallet_address: str) -> VerifyKey:
+    """
+    Return the verify key for a Solana wallet address.
+
+    The address is a base58 encoded 32-byte public key; solders' native parser
+    decodes it and rejects any other length. Returning users sign in
+    repeatedly, so keys are cached per address. Invalid addresses raise and
+    are not cached.
+    """
+    return VerifyKey(bytes(Pubkey.from_string(wallet_address)))
+
+def _check_wallet_signature(
+        nonce_record: Optional[Nonce],
+        wallet_address: str,
+        signature: str,
+        nonce: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Check a signature against its nonce record without committing.
+
+    An expired nonce record is deleted and a verified nonce is marked used;
+    the caller commits both.
+
+    Returns:
+        (is_valid, error_message)
+    """
+    if not nonce_record:
+        return False, "Invalid or expired nonce"
+
+    # Check if already used (prevent replay attacks)
+    if nonce_record.used:
+        return False, "Nonce already used"
+
+    # Check expiration
+    if nonce_record.is_expired():
+        db.session.delete(nonce_record)
+        return False, "Nonce expired"
+
+    # Check wallet address matches (constant time; bytes so any input compares)
+    if not hmac.compare_digest(nonce_record.wallet_address.encode('utf-8'), wallet_address.encode('utf-8')):
+        return False, "Wallet address mismatch"
+
+    # Reconstruct the message that was signed
+    # Calculate timestamp from expires_at (expires_at = timestamp + TTL)
+    original_timestamp = int(nonce_record.expires_at.timestamp()) - TTL_IN_SECONDS
+    message = _challenge_message(nonce, original_timestamp).encode('utf-8')
+
+    # Detect wallet type based on address format
+    is_solana = not wallet_address.startswith('0x')
+
+    if is_solana:
+        try:
+            verify_key = _solana_verify_key(wallet_address)
+            verify_key.verify(
+                message,
+                binascii.a2b_base64(signature)
+            )
+        except Exception as e:
+            return False, f"Solana signature verification failed: {str(e)}"
+    else:
+        # Ethereum address: use Base64Encoder for the address
+        verify_key = VerifyKey(wallet_address.encode("utf-8"), encoder=Base64Encoder)
+        verify_key.verify(
+            message,
+            binascii.a2b_base64(signature)
+        )
+
+    # Mark nonce as used
+    nonce_record.mark_used()
+
+    return True, None
+
 def verify_wallet_signature(
         wallet_address: str,
         signature: str,
@@ -72,61 +155,14 @@ def verify_wallet_signature(
         (is_valid, error_message)
     """
     try:
-        # Check nonce exists in database
-        nonce_record = Nonce.query.filter_by(nonce=nonce).first()
-
-        if not nonce_record:
-            return False, "Invalid or expired nonce"
-
-        # Check if already used (prevent replay attacks)
-        if nonce_record.used:
-            return False, "Nonce already used"
-
-        # Check expiration
-        if nonce_record.is_expired():
-            db.session.delete(nonce_record)
-            db.session.commit()
-            return False, "Nonce expired"
-
-        # Check wallet address matches
-        if nonce_record.wallet_address != wallet_address:
-            return False, "Wallet address mismatch"
-
-        # Reconstruct the message that was signed
-        # Calculate timestamp from expires_at (expires_at = timestamp + TTL)
-        original_timestamp = int(nonce_record.expires_at.timestamp()) - TTL_IN_SECONDS
-        message = f"Sign this message to authenticate with MYKOBO DAPP.\n\nNonce: {nonce}\nTimestamp: {original_timestamp}"
-
-        # Detect wallet type based on address format
-        is_solana = not wallet_address.startswith('0x')
-
-        if is_solana:
-            # Solana address: base58 encoded, need to decode to get 32-byte public key
-            try:
-                public_key_bytes = base58.b58decode(wallet_address)
-                if len(public_key_bytes) != 32:
-                    return False, f"Invalid Solana public key length: {len(public_key_bytes)} bytes"
-
-                verify_key = VerifyKey(public_key_bytes)
-                verify_key.verify(
-                    message.encode('utf-8'),
-                    base64.b64decode(signature)
-                )
-            except Exception as e:
-                return False, f"Solana signature verification failed: {str(e)}"
-        else:
-            # Ethereum address: use Base64Encoder for the address
-            verify_key = VerifyKey(wallet_address.encode("utf-8"), encoder=Base64Encoder)
-            verify_key.verify(
-                message.encode('utf-8'),
-                base64.b64decode(signature)
-            )
+        # Check nonce exists in database. The row lock makes a concurrent
+        # verify of the same nonce wait and then see it as used.
+        nonce_record = Nonce.query.filter_by(nonce=nonce).with_for_update().first()
 
-        # Mark nonce as used
-        nonce_record.mark_used()
+        result = _check_wallet_signature(nonce_record, wallet_address, signature, nonce)
         db.session.commit()
 
-        return True, None
+        return result
 
     except Exception as e:
         db.session.rollback()
@@ -139,20 +175,39 @@ def cleanup_expired_nonces():
     Returns:
         int: Number of nonces removed
     """
-    # Get all nonces and check expiry using the model's is_expired method
-    all_nonces = Nonce.query.all()
-    expired_nonces = [n for n in all_nonces if n.is_expired()]
-    count = len(expired_nonces)
-
-    # Delete expired nonces
-    for nonce in expired_nonces:
-        db.session.delete(nonce)
+    # One DELETE on the indexed expires_at column instead of loading every
+    # nonce; "fetch" drops the deleted rows from the session's identity map
+    result = db.session.execute(
+        delete(Nonce)
+        .where(Nonce.expires_at < datetime.now(UTC))
+        .execution_options(synchronize_session='fetch')
+    )
+    count = result.rowcount
 
     if count > 0:
         db.session.commit()
 
     return count
 
+def _cleanup_expired_nonces_if_due():
+    """
+    Run cleanup_expired_nonces at most once per NONCE_CLEANUP_INTERVAL.
+
+    The auth endpoints call this on every request, so the DELETE is amortized
+    over all requests in the interval. The last run time is kept per app in
+    current_app.extensions.
+
+    Returns:
+        int: Number of nonces removed (0 when the cleanup was skipped)
+    """
+    now = time.monotonic()
+    last_run = current_app.extensions.get('nonce_cleanup_at')
+    if last_run is not None and now - last_run < NONCE_CLEANUP_INTERVAL:
+        return 0
+
+    current_app.extensions['nonce_cleanup_at'] = now
+    return cleanup_expired_nonces()
+
 @auth_bp.route('/auth/challenge', methods=['POST'])
 @limiter.limit("5 per minute")
 def get_auth_challenge():
@@ -161,8 +216,8 @@ def get_auth_challenge():
 
     Payload: {"wallet_address": "base58_address"}
     """
-    # Clean up expired nonces before generating new challenge
-    cleanup_expired_nonces()
+    # Clean up expired nonces before generating new challenge (when due)
+    _cleanup_expired_nonces_if_due()
 
     data = request.get_json()
     wallet_address = data.get('wallet_address')
@@ -188,8 +243,8 @@ def verify_signature():
         "nonce": "challenge_nonce"
     }
     """
-    # Clean up expired nonces before verifying
-    cleanup_expired_nonces()
+    # Clean up expired nonces before verifying (when due)
+    _cleanup_expired_nonces_if_due()
 
     data = request.get_json()
     wallet_address = data.get('wallet_address')
@@ -281,9 +336,8 @@ def get_auth_stats():
     used_nonces = Nonce.query.filter_by(used=True).count()
     unused_nonces = total_nonces - used_nonces
 
-    # Count expired nonces using the model's is_expired method
-    all_nonces = Nonce.query.all()
-    expired_nonces = sum(1 for n in all_nonces if n.is_expired())
+    # Count expired nonces with the same condition the cleanup deletes on
+    expired_nonces = Nonce.query.filter(Nonce.expires_at < datetime.now(UTC)).count()
 
     # Perform cleanup
     cleaned = cleanup_expired_nonces()
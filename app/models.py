@@ -3,12 +3,28 @@ Database models for the Flask application.
 """
 from datetime import datetime, UTC
 from decimal import Decimal
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
 import json
 import uuid
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from app.database import db
 
 
+def _dialect_insert(model):
+    """
+    Create an INSERT for the session's database that supports ON CONFLICT.
+
+    Args:
+        model: Model class to insert into
+
+    Returns:
+        PostgreSQL or SQLite Insert construct
+    """
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    return dialect.insert(model)
+
+
 class Transaction(db.Model):
     """
     Model for storing transaction records sent to the ledger.
@@ -23,7 +39,16 @@ class Transaction(db.Model):
     __tablename__ = 'transactions'
     # For PostgreSQL, tables are in the 'dapp' schema
     # For SQLite tests, this is ignored via metadata.schema override
-    __table_args__ = {'schema': 'dapp'}
+    __table_args__ = (
+        # Partial index for the retry worker's unsent query; only covers the
+        # rows still waiting for a queue send
+        db.Index(
+            'transactions_unsent_created_at',
+            'created_at',
+            postgresql_where=db.text("message_id IS NULL")
+        ),
+        {'schema': 'dapp'},
+    )
 
     # Primary key
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -157,7 +182,16 @@ class Inbox(db.Model):
     - Enables transaction processing across both inbox and transaction tables
     """
     __tablename__ = 'inbox'
-    __table_args__ = {'schema': 'dapp'}
+    __table_args__ = (
+        # Partial index for the processor's poll query; only covers the small
+        # set of pending rows however large the inbox grows
+        db.Index(
+            'inbox_pending_created_at',
+            'created_at',
+            postgresql_where=db.text("status = 'pending'")
+        ),
+        {'schema': 'dapp'},
+    )
 
     # Primary key
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -234,29 +268,134 @@ class Inbox(db.Model):
             status='pending'
         )
 
-    def mark_processing(self):
-        """Mark message as being processed."""
+    @classmethod
+    def insert_if_new(
+            cls,
+            message_id: str,
+            message_body: Dict[str, Any],
+            receipt_handle: str = None
+    ) -> Optional[int]:
+        """
+        Insert a consumed message unless one with the same message_id exists.
+
+        Uses INSERT ... ON CONFLICT (message_id) DO NOTHING RETURNING id, so a
+        redelivered message is dropped by the database in a single statement.
+        The insert is not committed.
+
+        Args:
+            message_id: Unique message identifier (the message's idempotency key)
+            message_body: Payload dictionary
+            receipt_handle: SQS receipt handle
+
+        Returns:
+            ID of the new inbox row, or None if the message was already stored
+        """
+        # Status, retry count and timestamps come from the column defaults
+        return db.session.execute(
+            _dialect_insert(cls)
+            .values(
+                message_id=message_id,
+                receipt_handle=receipt_handle,
+                message_body=message_body,
+                transaction_reference=message_body.get('reference'),
+            )
+            .on_conflict_do_nothing(index_elements=['message_id'])
+            .returning(cls.id)
+        ).scalar()
+
+    @classmethod
+    def claim_batch(cls, limit: int, now: Optional[datetime] = None) -> List['Inbox']:
+        """
+        Atomically claim up to `limit` pending messages for processing.
+
+        Runs a single UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+        RETURNING, so concurrent processors never claim the same message and
+        rows locked by another worker are skipped rather than waited on. The
+        claim is not committed here; the rows stay locked until the caller
+        commits, and a rollback returns them to pending.
+
+        Args:
+            limit: Maximum number of messages to claim
+            now: Optional timestamp for processing_started_at/updated_at
+
+        Returns:
+            Claimed Inbox instances, oldest first, already marked as processing
+        """
+        now = now or datetime.now(UTC)
+        pending_ids = (
+            select(cls.id)
+            .where(cls.status == 'pending')
+            .order_by(cls.created_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        claimed = db.session.execute(
+            update(cls)
+            .where(cls.id.in_(pending_ids))
+            .values(status='processing', processing_started_at=now, updated_at=now)
+            .returning(cls)
+        ).scalars().all()
+        # RETURNING doesn't preserve the subquery's order
+        return sorted(claimed, key=lambda message: (message.created_at, message.id))
+
+    @classmethod
+    def purge_processed(cls, older_than: datetime) -> int:
+        """
+        Delete completed and failed messages last updated before a cutoff.
+
+        A purged message's message_id no longer deduplicates redeliveries, so
+        the cutoff should be older than the queue's redelivery window.
+
+        Args:
+            older_than: Messages updated before this time are removed
+
+        Returns:
+            Number of messages deleted
+        """
+        deleted = cls.query.filter(
+            cls.status.in_(('completed', 'failed')),
+            cls.updated_at < older_than
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def mark_processing(self, now: Optional[datetime] = None):
+        """
+        Mark message as being processed.
+
+        Args:
+            now: Optional timestamp to use, e.g. one shared by a whole batch
+        """
+        now = now or datetime.now(UTC)
         self.status = 'processing'
-        self.processing_started_at = datetime.now(UTC)
-        self.updated_at = datetime.now(UTC)
+        self.processing_started_at = now
+        self.updated_at = now
+
+    def mark_completed(self, now: Optional[datetime] = None):
+        """
+        Mark message as successfully processed.
 
-    def mark_completed(self):
-        """Mark message as successfully processed."""
+        Args:
+            now: Optional timestamp to use, e.g. one shared by a whole batch
+        """
+        now = now or datetime.now(UTC)
         self.status = 'completed'
-        self.processed_at = datetime.now(UTC)
-        self.updated_at = datetime.now(UTC)
+        self.processed_at = now
+        self.updated_at = now
 
-    def mark_failed(self, error_message: str):
+    def mark_failed(self, error_message: str, now: Optional[datetime] = None):
         """
         Mark message as failed.
 
         Args:
             error_message: Error message to store
+            now: Optional timestamp to use, e.g. one shared by a whole batch
         """
         self.status = 'failed'
         self.last_error = error_message
         self.retry_count += 1
-        self.updated_at = datetime.now(UTC)
+        self.updated_at = now or datetime.now(UTC)
 
     def reset_for_retry(self):
         """Reset message status to pending for retry."""
@@ -325,3 +464,81 @@ class Nonce(db.Model):
             'used_at': self.used_at.isoformat() if self.used_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class WalletKnownATA(db.Model):
+    """
+    Model recording wallets known to have an associated token account for a mint.
+
+    After the first payout of a token to a wallet, later payouts skip the
+    create-account instruction. The wallet owner can still close the account,
+    so a transfer that fails because it is missing forgets the entry and is
+    retried with the create instruction.
+    """
+    __tablename__ = 'wallet_known_ata'
+    __table_args__ = {'schema': 'dapp'}
+
+    # Wallet and token mint make up the key
+    wallet_address = db.Column(db.String(255), primary_key=True)
+    mint = db.Column(db.String(255), primary_key=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
+
+    def __repr__(self):
+        return f'<WalletKnownATA {self.wallet_address[:8]}... - {self.mint[:8]}...>'
+
+    @classmethod
+    def known_pairs(cls, pairs: Set[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """
+        Find which (wallet_address, mint) pairs already have a token account.
+
+        Args:
+            pairs: (wallet_address, mint) pairs to look up
+
+        Returns:
+            Subset of pairs that are known to have a token account
+        """
+        if not pairs:
+            return set()
+
+        rows = db.session.execute(
+            select(cls.wallet_address, cls.mint).where(
+                tuple_(cls.wallet_address, cls.mint).in_(list(pairs))
+            )
+        )
+        return {(wallet_address, mint) for wallet_address, mint in rows}
+
+    @classmethod
+    def remember(cls, wallet_address: str, mint: str):
+        """
+        Record that a wallet has a token account for a mint.
+
+        An existing entry is left untouched. The insert is not committed, so it
+        lands in the same commit as the caller's transaction update.
+
+        Args:
+            wallet_address: Wallet the token account belongs to
+            mint: Token mint address
+        """
+        db.session.execute(
+            _dialect_insert(cls)
+            .values(wallet_address=wallet_address, mint=mint, created_at=datetime.now(UTC))
+            .on_conflict_do_nothing()
+        )
+
+    @classmethod
+    def forget(cls, wallet_address: str, mint: str):
+        """
+        Remove the entry for a token account that turned out to be closed.
+
+        The next payout to the wallet then creates the account again. The
+        delete is not committed.
+
+        Args:
+            wallet_address: Wallet the token account belonged to
+            mint: Token mint address
+        """
+        db.session.execute(
+            delete(cls).where(cls.wallet_address == wallet_address, cls.mint == mint)
+        )
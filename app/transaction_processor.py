@@ -9,14 +9,34 @@ This background process implements the inbox pattern by:
 5. Updating inbox message status after processing
 6. Sending status update messages to queue after successful Solana transactions
 """
-import json
+import select
+import struct
 import time
 import signal
 import sys
+import threading
 import uuid
-from datetime import datetime, UTC
-from typing import Dict, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, UTC
+from decimal import Decimal, ROUND_DOWN
+from itertools import accumulate
+from typing import Dict, Any, List, Optional, Tuple, Union
 from flask import Flask
+from sqlalchemy import and_, bindparam, or_, text, update
+from solana.rpc.api import Client
+from solana.rpc.core import RPCException
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction as SolanaTransaction
+from solders.transaction_status import InstructionErrorFieldless, TransactionErrorInstructionError
+from spl.memo.constants import MEMO_PROGRAM_ID
+from spl.memo.instructions import MemoParams, create_memo
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import (
+    get_associated_token_address,
+    create_idempotent_associated_token_account,
+)
 from mykobo_py.message_bus import (
     PaymentPayload,
     StatusUpdatePayload,
@@ -27,7 +47,60 @@ from mykobo_py.message_bus import (
 from mykobo_py.message_bus.models.message import TransactionType
 
 from app.database import db
-from app.models import Transaction, Inbox
+from app.message_bus import send_message_batch
+from app.models import Transaction, Inbox, WalletKnownATA
+
+# Processed inbox rows are kept at least as long as SQS can redeliver a message
+INBOX_RETENTION_MIN_DAYS = 14
+
+# Transactions being or already paid out, which a redelivered message must not reopen
+_PAID_OUT_STATUSES = ('PROCESSING', 'COMPLETED')
+
+# EURC and USDC both use 6 decimal places on Solana
+TOKEN_DECIMALS = 6
+_SCALE = Decimal(10) ** TOKEN_DECIMALS
+
+# Largest serialized Solana transaction, in bytes
+SOLANA_MAX_TRANSACTION_SIZE = 1232
+
+# Errors the token program returns from transfer_checked when the destination
+# token account has no data (closed) or was never initialized
+_MISSING_TOKEN_ACCOUNT_ERRORS = (
+    InstructionErrorFieldless.InvalidAccountData,
+    InstructionErrorFieldless.UninitializedAccount,
+)
+
+# SPL Token TransferChecked: instruction index, u64 amount, u8 decimals
+_TRANSFER_CHECKED_LAYOUT = struct.Struct('<BQB')
+_TRANSFER_CHECKED_INDEX = 12
+
+
+class _InboxBatch:
+    """
+    Work collected while processing one batch of inbox messages.
+
+    Inbox status changes are recorded here and written with a few bulk
+    statements once the batch is done, instead of an UPDATE per message.
+    """
+
+    def __init__(self, transactions_by_reference: Dict[str, Transaction], now: datetime):
+        self.transactions_by_reference = transactions_by_reference
+        self.now = now
+        self.pending_transfers: List[Tuple[Inbox, Transaction, Dict[str, Any]]] = []
+        self.completed_ids: List[int] = []
+        self.failures: List[Tuple[int, str]] = []
+        self.funds_received_references: List[str] = []
+        self.completed_transactions: List[Dict[str, Any]] = []
+        self.failed_transaction_ids: List[str] = []
+        self.outbox: List[Dict[str, Any]] = []
+
+    def clear_outcomes(self):
+        """Forget the status changes recorded so far, once they are committed."""
+        self.completed_ids = []
+        self.failures = []
+        self.funds_received_references = []
+        self.completed_transactions = []
+        self.failed_transaction_ids = []
 
 
 class TransactionProcessor:
@@ -57,14 +130,68 @@ class TransactionProcessor:
 
         # Solana configuration
         self.solana_rpc_url = app.config.get("SOLANA_RPC_URL")
+        self.solana_rpc_timeout = 10.0  # seconds
         self.distribution_private_key = app.config.get("SOLANA_DISTRIBUTION_PRIVATE_KEY")
         self.eurc_mint = app.config.get("EURC_TOKEN_MINT")
         self.usdc_mint = app.config.get("USDC_TOKEN_MINT")
 
+        # Supported currencies mapped to their configured token mint
+        self._mint_by_currency = {
+            currency: mint
+            for currency, mint in (('EURC', self.eurc_mint), ('USDC', self.usdc_mint))
+            if mint
+        }
+
+        # Solana client and parsed key material, built once on first use. The
+        # transfer pool workers race to build them, so the lock lets one through.
+        self._solana_context_lock = threading.Lock()
+        self._solana_client = None
+        self._distribution_keypair = None
+        self._distribution_pubkey = None
+        self._mint_pubkeys = {}
+        self._distribution_ata = {}
+        self._transfer_builders = {}
+        self._rpc_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="solana-rpc")
+
+        # A blockhash stays valid for ~60s, so one is shared by a burst of transfers
+        self._blockhash_cache = None
+        self._blockhash_ts = 0.0
+        self._blockhash_ttl = 20.0
+        self._blockhash_lock = threading.Lock()
+
+        # Transfers packed into one Solana transaction. One per transaction keeps
+        # every payout independent; more saves fees but they succeed or fail together.
+        self.max_transfers_per_tx = max(1, app.config.get("SOLANA_MAX_TRANSFERS_PER_TX", 1))
+
+        # Solana transfers of a batch are submitted concurrently on this pool
+        self.max_concurrent_transfers = max(1, app.config.get("SOLANA_MAX_CONCURRENT_TRANSFERS", 8))
+        self._tx_executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_transfers,
+            thread_name_prefix="solana-tx"
+        )
+
+        # Service token reused across status updates until shortly before it expires
+        self._service_token = None
+        self._service_token_expiry = 0.0
+        self._service_token_ttl = 300  # seconds, unless the token says otherwise
+        self._service_token_refresh_margin = 30  # seconds
+        self._service_token_lock = threading.Lock()
+
         # Polling configuration
         self.poll_interval = 5  # seconds between polls
         self.batch_size = 10  # number of messages to process per batch
 
+        # PostgreSQL connection LISTENing for new inbox rows (see start())
+        self.inbox_channel = 'inbox_new'
+        self._inbox_listener = None
+
+        # Processed inbox messages older than the retention period are purged
+        self.inbox_retention_days = max(
+            app.config.get("INBOX_RETENTION_DAYS", 30), INBOX_RETENTION_MIN_DAYS
+        )
+        self.purge_interval = 3600  # seconds between purges
+        self._last_purge = 0.0
+
         # Status transitions that trigger Solana transactions
         # APPROVED means the ledger has approved the transaction for payout
         self.actionable_statuses = ['APPROVED']
@@ -81,15 +208,84 @@ class TransactionProcessor:
         signal.signal(signal.SIGINT, self._handle_shutdown)
         signal.signal(signal.SIGTERM, self._handle_shutdown)
 
+        # Open a pooled connection up front so the first poll doesn't pay for it
+        with self.app.app_context():
+            db.session.execute(text("SELECT 1"))
+
+        self._open_inbox_listener()
+
         # Main processing loop
         try:
             while self.running:
-                self._process_messages()
-                if self.running:
-                    time.sleep(self.poll_interval)
+                claimed = self._process_messages()
+                self._purge_inbox_if_due()
+                # A full batch means there is probably more waiting, so poll again straight away
+                if self.running and claimed < self.batch_size:
+                    self._wait_for_messages()
         except Exception as e:
             self.logger.exception(f"Fatal error in processor: {e}")
             sys.exit(1)
+        finally:
+            self._close_inbox_listener()
+            # Let any in-flight Solana submissions finish before exiting
+            self._tx_executor.shutdown(wait=True)
+            self._rpc_executor.shutdown(wait=True)
+
+    def _open_inbox_listener(self):
+        """
+        LISTEN for inbox insert notifications on a dedicated connection.
+
+        The inbox table has a trigger that NOTIFYs this channel for every new
+        message, so the processor can wake up as soon as work arrives instead of
+        waiting out the poll interval. Only available on PostgreSQL; elsewhere
+        the processor keeps polling on a fixed interval.
+        """
+        with self.app.app_context():
+            if db.engine.dialect.name != 'postgresql':
+                return
+
+            try:
+                listener = db.engine.raw_connection()
+                driver_connection = listener.driver_connection
+                driver_connection.autocommit = True
+                with driver_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.inbox_channel}")
+                self._inbox_listener = listener
+                self.logger.info(f"Listening for new inbox messages on channel: {self.inbox_channel}")
+            except Exception as e:
+                self.logger.warning(f"Could not listen for inbox notifications, polling instead: {e}")
+
+    def _close_inbox_listener(self):
+        """Close the LISTEN connection, if one is open."""
+        if self._inbox_listener is None:
+            return
+        try:
+            self._inbox_listener.invalidate()
+        except Exception as e:
+            self.logger.debug(f"Error closing inbox listener: {e}")
+        self._inbox_listener = None
+
+    def _wait_for_messages(self):
+        """
+        Wait until a new inbox message is announced or the poll interval elapses.
+
+        Without a listener this is a plain sleep for the poll interval.
+        """
+        if self._inbox_listener is None:
+            time.sleep(self.poll_interval)
+            return
+
+        driver_connection = self._inbox_listener.driver_connection
+        try:
+            ready, _, _ = select.select([driver_connection], [], [], self.poll_interval)
+            if ready:
+                # One poll covers every notification received so far
+                driver_connection.poll()
+                del driver_connection.notifies[:]
+        except Exception as e:
+            self.logger.warning(f"Inbox listener failed, falling back to polling: {e}")
+            self._close_inbox_listener()
+            time.sleep(self.poll_interval)
 
     def stop(self):
         """Stop the processor gracefully."""
@@ -101,57 +297,355 @@ class TransactionProcessor:
         self.logger.info(f"Received signal {signum}, shutting down gracefully...")
         self.stop()
 
-    def _process_messages(self):
-        """Poll inbox table and process pending messages."""
+    def _process_messages(self) -> int:
+        """
+        Poll inbox table and process pending messages.
+
+        Returns:
+            Number of messages claimed from the inbox
+        """
         with self.app.app_context():
             try:
-                # Get pending messages from inbox
-                pending_messages = Inbox.query.filter_by(
-                    status='pending'
-                ).order_by(
-                    Inbox.created_at.asc()
-                ).limit(self.batch_size).all()
+                # Claim pending messages from inbox, marking them as processing
+                now = datetime.now(UTC)
+                pending_messages = Inbox.claim_batch(self.batch_size, now)
 
                 if not pending_messages:
                     self.logger.debug("No pending messages in inbox")
-                    return
+                    return 0
 
-                self.logger.info(f"Found {len(pending_messages)} pending message(s) in inbox")
+                self.logger.info(f"Claimed {len(pending_messages)} pending message(s) from inbox")
 
-                # Process each message
+                # Only the first message per reference is handled in this batch. Later
+                # ones stay pending until the next poll, once the first has settled,
+                # so the same transaction can't be paid out twice.
+                batch_messages = []
+                deferred_ids = []
+                seen_references = set()
                 for inbox_message in pending_messages:
-                    try:
-                        self._process_inbox_message(inbox_message)
-                    except Exception as e:
-                        self.logger.exception(
-                            f"Error processing inbox message {inbox_message.id}: {e}"
+                    reference = inbox_message.message_body.get('reference')
+                    if reference and reference in seen_references:
+                        self.logger.info(
+                            f"Deferring inbox message {inbox_message.id}: "
+                            f"[{reference}] is already being processed in this batch"
                         )
-                        # Mark as failed but continue processing other messages
-                        inbox_message.mark_failed(str(e))
-                        db.session.commit()
+                        deferred_ids.append(inbox_message.id)
+                        continue
+                    seen_references.add(reference)
+                    batch_messages.append(inbox_message)
+
+                # Hand deferred messages back so the next poll picks them up
+                if deferred_ids:
+                    db.session.execute(
+                        update(Inbox)
+                        .where(Inbox.id.in_(deferred_ids))
+                        .values(status='pending', processing_started_at=None, updated_at=now)
+                    )
 
+                # Look up all transactions referenced by this batch in a single query
+                batch = _InboxBatch(self._fetch_transactions_for_batch(batch_messages), now)
+
+                # Process each message; outcomes are recorded for the bulk writes
+                with db.session.no_autoflush:
+                    for inbox_message in batch_messages:
+                        try:
+                            self._process_inbox_message(inbox_message, batch)
+                        except Exception as e:
+                            # Already logged with its traceback; record it for the bulk
+                            # failure update and continue processing other messages
+                            self.logger.error(
+                                "Inbox message failed: id=%s reference=%s error=%s",
+                                inbox_message.id, inbox_message.transaction_reference, e
+                            )
+                            batch.failures.append((inbox_message.id, str(e)))
+
+                # Commit the claim and move the transactions about to be paid to
+                # PROCESSING before anything is sent. From here on a failure can't
+                # hand a withdrawal back to a later poll, which would pay it twice.
+                self._reserve_transfers(batch)
+                self._write_batch_outcomes(batch)
             except Exception as e:
+                # Nothing has been sent yet; releases the claim, so the messages
+                # are picked up again
+                db.session.rollback()
                 self.logger.exception(f"Error in inbox polling: {e}")
+                return 0
+
+            self._execute_pending_transfers(batch)
+
+            try:
+                self._write_batch_outcomes(batch)
+            except Exception as e:
+                # The transfers went out, so the claim and the PROCESSING status
+                # stay committed; record the signatures for reconciliation
+                db.session.rollback()
+                self.logger.exception(f"Error recording transfer outcomes: {e}")
+                for transaction in batch.completed_transactions:
+                    self.logger.error(
+                        "Transfer sent but not recorded: transaction=%s tx_hash=%s",
+                        transaction['id'], transaction['tx_hash']
+                    )
+                for transaction_id in batch.failed_transaction_ids:
+                    self.logger.error("Transfer failed and not recorded: transaction=%s", transaction_id)
+
+            # Payouts that went out are reported to the ledger either way
+            self._flush_status_updates(batch.outbox)
+            return len(pending_messages)
+
+    def _reserve_transfers(self, batch: _InboxBatch):
+        """
+        Mark the transactions a batch is about to pay out as PROCESSING.
 
-    def _process_inbox_message(self, inbox_message: Inbox):
+        Transfers whose transaction was reserved by another worker first are
+        dropped from the batch and their messages completed without a send.
+
+        Args:
+            batch: Batch whose pending transfers are about to be sent
         """
-        Process a single inbox message.
+        if not batch.pending_transfers:
+            return
+
+        reserved = self._reserve_transactions(
+            [transaction.id for _, transaction, _ in batch.pending_transfers], batch.now
+        )
+
+        pending_transfers = []
+        for inbox_message, transaction, transfer in batch.pending_transfers:
+            if transaction.id in reserved:
+                pending_transfers.append((inbox_message, transaction, transfer))
+                continue
+            self.logger.info(
+                f"Transaction [{transaction.reference}] is already being paid out, "
+                f"completing inbox message {inbox_message.id} without a transfer"
+            )
+            batch.completed_ids.append(inbox_message.id)
+        batch.pending_transfers = pending_transfers
+
+    @staticmethod
+    def _reserve_transactions(transaction_ids: List[str], now: datetime) -> set:
+        """
+        Move actionable transactions to PROCESSING and return the ones that moved.
+
+        The status check is part of the UPDATE, so when two workers race for
+        the same transaction only one of them gets it back: on PostgreSQL the
+        second UPDATE waits for the first to commit and then no longer matches.
+        A PROCESSING transaction is not actionable, so once the reservation is
+        committed no later message can pay it out again.
+
+        Args:
+            transaction_ids: IDs of the transactions about to be paid out
+            now: Timestamp for updated_at
+
+        Returns:
+            IDs of the transactions reserved by this call
+        """
+        return set(db.session.execute(
+            update(Transaction)
+            .where(
+                Transaction.id.in_(transaction_ids),
+                or_(
+                    and_(Transaction.transaction_type == 'DEPOSIT', Transaction.status == 'PENDING_ANCHOR'),
+                    and_(Transaction.transaction_type == 'WITHDRAW', Transaction.status == 'PENDING_PAYEE'),
+                ),
+            )
+            .values(status='PROCESSING', updated_at=now)
+            .returning(Transaction.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+
+    def _write_batch_outcomes(self, batch: _InboxBatch):
+        """
+        Persist the outcomes recorded on a batch so far and commit them.
+
+        Called twice per batch: before the transfers are sent, committing the
+        claim together with every outcome that needs no transfer, and after
+        they are sent, for the transfer outcomes. Written outcomes are cleared
+        from the batch.
+
+        Completed messages are updated with a single UPDATE ... WHERE id IN (...),
+        failures with one executemany carrying each message's error. Paid out
+        transactions get one executemany by primary key for their signatures.
+
+        Args:
+            batch: The processed batch
+        """
+        now = datetime.now(UTC)
+
+        if batch.funds_received_references:
+            db.session.execute(
+                update(Transaction)
+                .where(
+                    Transaction.reference.in_(batch.funds_received_references),
+                    Transaction.status.notin_(_PAID_OUT_STATUSES)
+                )
+                .values(status='PENDING_ANCHOR', updated_at=now)
+            )
+            self.logger.info(
+                f"Updated {len(batch.funds_received_references)} transaction(s) to PENDING_ANCHOR"
+            )
+
+        if batch.completed_transactions:
+            db.session.execute(update(Transaction), batch.completed_transactions)
+
+        if batch.failed_transaction_ids:
+            db.session.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(batch.failed_transaction_ids))
+                .values(status='FAILED', updated_at=now)
+            )
+
+        if batch.completed_ids:
+            db.session.execute(
+                update(Inbox)
+                .where(Inbox.id.in_(batch.completed_ids))
+                .values(status='completed', processed_at=now, updated_at=now)
+            )
+
+        if batch.failures:
+            inbox_table = Inbox.__table__
+            db.session.execute(
+                update(inbox_table)
+                .where(inbox_table.c.id == bindparam('failed_id'))
+                .values(
+                    status='failed',
+                    last_error=bindparam('error'),
+                    retry_count=inbox_table.c.retry_count + 1,
+                    updated_at=now
+                ),
+                [{'failed_id': inbox_id, 'error': error} for inbox_id, error in batch.failures]
+            )
+
+        db.session.commit()
+        batch.clear_outcomes()
+
+    def _purge_inbox_if_due(self):
+        """Delete old completed and failed inbox messages, at most once per purge interval."""
+        if time.monotonic() - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = time.monotonic()
+
+        with self.app.app_context():
+            try:
+                cutoff = datetime.now(UTC) - timedelta(days=self.inbox_retention_days)
+                deleted = Inbox.purge_processed(cutoff)
+                if deleted:
+                    self.logger.info(f"Purged {deleted} processed inbox message(s) older than {cutoff}")
+            except Exception as e:
+                db.session.rollback()
+                self.logger.exception(f"Error purging inbox: {e}")
+
+    def _execute_pending_transfers(self, batch: _InboxBatch):
+        """
+        Send the Solana transfers collected from a batch and record the outcomes.
+
+        The RPC submissions run concurrently on the transfer pool, while every
+        database write stays on the calling thread and its session.
+
+        Args:
+            batch: Batch whose pending transfers should be sent
+        """
+        if not batch.pending_transfers:
+            return
+
+        transfers = [transfer for _, _, transfer in batch.pending_transfers]
+        self._flag_new_token_accounts(transfers)
+
+        if self.max_transfers_per_tx > 1:
+            # Each group is packed into as few Solana transactions as fit
+            groups = [
+                transfers[i:i + self.max_transfers_per_tx]
+                for i in range(0, len(transfers), self.max_transfers_per_tx)
+            ]
+            futures = [
+                self._tx_executor.submit(self._create_and_send_solana_transfers, group)
+                for group in groups
+            ]
+            results = []
+            for group, future in zip(groups, futures):
+                # An error only fails its own group; the others may already be sent
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    self.logger.exception(f"Error sending Solana transfers: {e}")
+                    results.extend(self._transfer_error(e) for _ in group)
+        else:
+            futures = [
+                self._tx_executor.submit(self._create_and_send_solana_transaction, **transfer)
+                for transfer in transfers
+            ]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    self.logger.exception(f"Error sending Solana transfer: {e}")
+                    results.append(self._transfer_error(e))
+        now = datetime.now(UTC)
+
+        # Ledger messages are sent together once every transfer has settled
+        for (inbox_message, transaction, transfer), tx_result in zip(batch.pending_transfers, results):
+            try:
+                self._forget_closed_token_account(transfer, tx_result)
+                self._finalize_transaction(
+                    transaction, tx_result, batch, now, self._new_token_account(transfer)
+                )
+
+                batch.completed_ids.append(inbox_message.id)
+                self.logger.debug(
+                    "Processed inbox message %s for [%s]", inbox_message.id, transaction.reference
+                )
+            except Exception as e:
+                self.logger.exception(
+                    f"Error processing inbox message {inbox_message.id}: {e}"
+                )
+                batch.failures.append((inbox_message.id, str(e)))
+
+    def _fetch_transactions_for_batch(self, inbox_messages: List[Inbox]) -> Dict[str, Transaction]:
+        """
+        Load the transactions referenced by a batch of inbox messages.
+
+        Args:
+            inbox_messages: Inbox model instances in the current batch
+
+        Returns:
+            Dict mapping transaction reference to Transaction
+        """
+        references = {
+            inbox_message.message_body.get('reference')
+            for inbox_message in inbox_messages
+            if inbox_message.message_body.get('reference')
+        }
+        if not references:
+            return {}
+
+        transactions = Transaction.query.filter(
+            Transaction.reference.in_(references)
+        ).all()
+        return {transaction.reference: transaction for transaction in transactions}
+
+    def _process_inbox_message(self, inbox_message: Inbox, batch: _InboxBatch) -> bool:
+        """
+        Process a single inbox message of a batch.
+
+        The transaction is taken from the batch pre-fetch, the Solana transfer
+        is queued on the batch instead of being sent inline, and the final
+        inbox status is recorded for a bulk update rather than written here.
 
         Args:
             inbox_message: Inbox model instance
+            batch: Batch the message belongs to
+
+        Returns:
+            True if a transfer was queued on the batch
         """
-        self.logger.info(
-            f"Processing inbox message: id={inbox_message.id}, "
-            f"reference={inbox_message.transaction_reference}"
+        self.logger.debug(
+            "Processing inbox message: id=%s reference=%s",
+            inbox_message.id, inbox_message.transaction_reference
         )
 
         try:
-            # Mark as processing
-            inbox_message.mark_processing()
-            db.session.commit()
-
             message_body = inbox_message.message_body
-            self.logger.debug(f"Message body: {json.dumps(message_body, indent=2)}")
+            self.logger.debug("Message body: %s", message_body)
 
             # message_body IS the payload (flat structure)
             reference = message_body.get('reference')
@@ -160,46 +654,43 @@ class TransactionProcessor:
 
             if not reference:
                 self.logger.warning(f"Message has no reference, marking as failed")
-                inbox_message.mark_failed("Message has no reference")
-                db.session.commit()
-                return
+                batch.failures.append((inbox_message.id, "Message has no reference"))
+                return False
 
-            self.logger.info(
-                f"Transaction [{reference}] - Status: {status}, ID: {transaction_id}"
-            )
+            self.logger.debug("Transaction [%s] - Status: %s, ID: %s", reference, status, transaction_id)
 
-            # Look up the transaction in the database
-            transaction = Transaction.query.filter_by(reference=reference).first()
+            # Look up the transaction in the batch pre-fetch
+            transaction = batch.transactions_by_reference.get(reference)
 
             if not transaction:
                 error_msg = f"Transaction not found in database for reference: {reference}"
                 self.logger.error(error_msg)
-                inbox_message.mark_failed(error_msg)
-                db.session.commit()
-                return
+                batch.failures.append((inbox_message.id, error_msg))
+                return False
 
-            self.logger.info(
-                f"Found transaction in DB: type={transaction.transaction_type}, "
-                f"status={transaction.status}, "
-                f"outgoing_currency={transaction.outgoing_currency}"
+            self.logger.debug(
+                "Found transaction in DB: type=%s status=%s outgoing_currency=%s",
+                transaction.transaction_type, transaction.status, transaction.outgoing_currency
             )
 
-            # Handle FUNDS_RECEIVED status - update transaction to PENDING_ANCHOR
-            if status == 'FUNDS_RECEIVED':
+            # Handle FUNDS_RECEIVED status - update transaction to PENDING_ANCHOR.
+            # A redelivery whose inbox row was purged must not reopen a payout.
+            if status == 'FUNDS_RECEIVED' and transaction.status.upper() in _PAID_OUT_STATUSES:
+                self.logger.warning(
+                    f"Ignoring FUNDS_RECEIVED for transaction [{reference}] already {transaction.status}"
+                )
+            elif status == 'FUNDS_RECEIVED':
                 self.logger.info(
                     f"Transaction [{reference}] received FUNDS_RECEIVED status, "
                     f"updating to PENDING_ANCHOR"
                 )
-                transaction.status = 'PENDING_ANCHOR'
-                transaction.updated_at = datetime.now(UTC)
-                db.session.commit()
-                self.logger.info(
-                    f"Updated transaction [{reference}] status to PENDING_ANCHOR"
-                )
+                batch.funds_received_references.append(reference)
 
             # Check if this is a withdrawal that needs Solana transaction
             if self._should_process_transaction(transaction, status):
-                self._handle_transaction(transaction)
+                transfer = self._prepare_transfer(transaction)
+                batch.pending_transfers.append((inbox_message, transaction, transfer))
+                return True
             else:
                 self.logger.info(
                     f"Transaction [{reference}] does not require Solana processing "
@@ -207,11 +698,9 @@ class TransactionProcessor:
                 )
 
             # Mark as completed after successful processing
-            inbox_message.mark_completed()
-            db.session.commit()
-            self.logger.info(
-                f"Successfully processed inbox message {inbox_message.id} for [{reference}]"
-            )
+            batch.completed_ids.append(inbox_message.id)
+            self.logger.debug("Processed inbox message %s for [%s]", inbox_message.id, reference)
+            return False
 
         except Exception as e:
             self.logger.exception(f"Error processing inbox message {inbox_message.id}: {e}")
@@ -237,103 +726,180 @@ class TransactionProcessor:
 
         return False
 
-    def _handle_transaction(
-            self,
-            transaction: Transaction
-    ):
+    def _prepare_transfer(self, transaction: Transaction) -> Dict[str, Any]:
         """
-        Handle withdrawal transaction by creating and sending Solana transaction.
+        Validate a transaction and build the arguments for its Solana transfer.
 
         Args:
             transaction: Transaction model instance from database
+
+        Returns:
+            Keyword arguments for _create_and_send_solana_transaction
+
+        Raises:
+            ValueError: If the transaction can't be paid out
         """
         reference = transaction.reference
 
-        try:
-            # Extract transaction details from the database record
-            wallet_address = transaction.wallet_address
-            value = transaction.value
-            fee = transaction.fee
-            outgoing_currency = transaction.outgoing_currency
-            incoming_currency = transaction.incoming_currency
+        # Extract transaction details from the database record
+        wallet_address = transaction.wallet_address
+        value = transaction.value
+        fee = transaction.fee
+        outgoing_currency = transaction.outgoing_currency
+        incoming_currency = transaction.incoming_currency
+
+        self.logger.debug(
+            "Processing %s [%s]: %s %s -> %s, Fee: %s, Net: %s",
+            transaction.transaction_type, reference, value, incoming_currency,
+            outgoing_currency, fee, value - fee
+        )
 
-            self.logger.info(
-                f"Processing {transaction.transaction_type} [{reference}]: "
-                f"{value} {incoming_currency} -> {outgoing_currency}, "
-                f"Fee: {fee}, Net: {value - fee}"
-            )
+        # Validate required fields
+        if not wallet_address:
+            raise ValueError("No wallet address found for transaction")
 
-            # Validate required fields
-            if not wallet_address:
-                raise ValueError("No wallet address found for transaction")
+        if not outgoing_currency:
+            raise ValueError("No outgoing currency specified")
 
-            if not outgoing_currency:
-                raise ValueError("No outgoing currency specified")
+        if value <= 0:
+            raise ValueError(f"Invalid value: {value}")
 
-            if value <= 0:
-                raise ValueError(f"Invalid value: {value}")
+        # Calculate net amount (value minus fee)
+        net_amount = value - fee
 
-            # Calculate net amount (value minus fee)
-            net_amount = value - fee
+        if net_amount <= 0:
+            raise ValueError(f"Net amount is zero or negative: {net_amount}")
 
-            if net_amount <= 0:
-                raise ValueError(f"Net amount is zero or negative: {net_amount}")
+        # Determine token mint based on outgoing currency
+        token_mint = self._get_token_mint(outgoing_currency)
 
-            # Determine token mint based on outgoing currency
-            token_mint = self._get_token_mint(outgoing_currency)
+        # Convert to the token's smallest unit with exact decimal arithmetic,
+        # never sending more than the net amount
+        amount_in_smallest_unit = int((net_amount * _SCALE).to_integral_value(rounding=ROUND_DOWN))
 
-            # Create and send Solana transaction
-            tx_result = self._create_and_send_solana_transaction(
-                recipient_address=wallet_address,
-                amount=float(net_amount),
-                token_mint=token_mint,
-                currency=outgoing_currency,
-                memo=reference
+        return {
+            "recipient_address": wallet_address,
+            "amount_in_smallest_unit": amount_in_smallest_unit,
+            "token_mint": token_mint,
+            "currency": outgoing_currency,
+            "memo": reference,
+        }
+
+    def _flag_new_token_accounts(self, transfers: List[Dict[str, Any]]):
+        """
+        Set whether each transfer needs to create the recipient's token account.
+
+        Recipients already known to have a token account for the mint are
+        looked up with a single query and skip the create-account instruction.
+
+        Args:
+            transfers: Transfer arguments from _prepare_transfer, updated in place
+        """
+        known = WalletKnownATA.known_pairs({
+            (transfer['recipient_address'], transfer['token_mint']) for transfer in transfers
+        })
+        for transfer in transfers:
+            transfer['create_recipient_account'] = (
+                (transfer['recipient_address'], transfer['token_mint']) not in known
             )
 
-            if tx_result['status'] == 'success':
-                solana_signature = tx_result.get('transaction_signature')
-                self.logger.info(
-                    f"Solana transaction created for [{reference}]: "
-                    f"Signature: {solana_signature}"
-                )
+    @staticmethod
+    def _new_token_account(transfer: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        Get the (wallet_address, mint) token account a transfer creates, if any.
 
-                # Update transaction record in database (already in app context)
-                transaction.status = 'COMPLETED'
-                transaction.updated_at = datetime.now(UTC)
-                transaction.tx_hash = solana_signature
-                db.session.commit()
-                self.logger.info(f"Updated transaction [{reference}] status to COMPLETED with tx_hash: {solana_signature}")
-
-                # Send payment message to queue
-                payment_payload = PaymentPayload(
-                    external_reference=solana_signature,
-                    payer_name=f"{transaction.first_name} {transaction.last_name}",
-                    currency=transaction.outgoing_currency,
-                    value=f"{float(transaction.value - transaction.fee)}",
-                    source="CHAIN_SOLANA",
-                    reference=transaction.reference,
-                    bank_account_number=None
-                )
-                self._send_status_update(payment_payload, transaction.reference)
-            else:
-                # Update transaction record in database (already in app context)
-                transaction.status = 'FAILED'
-                transaction.updated_at = datetime.now(UTC)
-                db.session.commit()
-
-                # Send status update message to queue
-                status_update_payload = StatusUpdatePayload(
-                    reference=transaction.reference,
-                    status='FAILED',
-                    message=f"Failed to create Solana transaction: {tx_result.get('message')}"
-                )
-                self._send_status_update(status_update_payload, transaction.reference)
-                raise Exception(f"Failed to create Solana transaction: {tx_result.get('message')}")
+        Args:
+            transfer: Transfer arguments from _prepare_transfer
 
-        except Exception as e:
-            self.logger.exception(f"Error handling withdraw [{reference}]: {e}")
-            raise
+        Returns:
+            (wallet_address, mint) tuple, or None if the account already existed
+        """
+        if not transfer.get('create_recipient_account', True):
+            return None
+        return transfer['recipient_address'], transfer['token_mint']
+
+    @staticmethod
+    def _forget_closed_token_account(transfer: Dict[str, Any], tx_result: Dict[str, Any]):
+        """
+        Drop the known token account of a transfer that found it closed.
+
+        The next payout to the wallet then includes the create instruction
+        again. Not committed; it lands with the transfer's outcome.
+
+        Args:
+            transfer: Transfer arguments from _prepare_transfer
+            tx_result: Result returned for the transfer
+        """
+        if tx_result.get('token_account_closed'):
+            WalletKnownATA.forget(transfer['recipient_address'], transfer['token_mint'])
+
+    def _finalize_transaction(
+            self,
+            transaction: Transaction,
+            tx_result: Dict[str, Any],
+            batch: _InboxBatch,
+            now: datetime,
+            new_token_account: Optional[Tuple[str, str]] = None
+    ):
+        """
+        Record the outcome of a Solana transfer on its batch.
+
+        The transaction update and the ledger message are recorded on the
+        batch, to be written in bulk and sent together.
+
+        Args:
+            transaction: Transaction model instance from database
+            tx_result: Result returned by _create_and_send_solana_transaction
+            batch: Batch the transfer belongs to
+            now: Timestamp for the update, shared across the batch
+            new_token_account: Optional (wallet_address, mint) token account the
+                transfer created, remembered so later payouts skip creating it
+
+        Raises:
+            Exception: If the Solana transaction failed
+        """
+        reference = transaction.reference
+
+        if tx_result['status'] == 'success':
+            solana_signature = tx_result.get('transaction_signature')
+
+            if new_token_account is not None:
+                WalletKnownATA.remember(*new_token_account)
+            batch.completed_transactions.append({
+                'id': transaction.id,
+                'status': 'COMPLETED',
+                'tx_hash': solana_signature,
+                'updated_at': now,
+            })
+            # One summary line per payout; the steps leading up to it are logged at DEBUG
+            self.logger.info(
+                "Transaction completed: reference=%s type=%s amount=%s %s wallet=%s tx_hash=%s",
+                reference, transaction.transaction_type, transaction.value - transaction.fee,
+                transaction.outgoing_currency, transaction.wallet_address, solana_signature
+            )
+
+            # Send payment message to queue
+            payment_payload = PaymentPayload(
+                external_reference=solana_signature,
+                payer_name=f"{transaction.first_name} {transaction.last_name}",
+                currency=transaction.outgoing_currency,
+                value=f"{float(transaction.value - transaction.fee)}",
+                source="CHAIN_SOLANA",
+                reference=transaction.reference,
+                bank_account_number=None
+            )
+            self._send_status_update(payment_payload, transaction.reference, batch.outbox)
+        else:
+            batch.failed_transaction_ids.append(transaction.id)
+
+            # Send status update message to queue
+            status_update_payload = StatusUpdatePayload(
+                reference=transaction.reference,
+                status='FAILED',
+                message=f"Failed to create Solana transaction: {tx_result.get('message')}"
+            )
+            self._send_status_update(status_update_payload, transaction.reference, batch.outbox)
+            raise Exception(f"Failed to create Solana transaction: {tx_result.get('message')}")
 
     def _get_token_mint(self, currency: str) -> str:
         """
@@ -348,167 +914,534 @@ class TransactionProcessor:
         Raises:
             ValueError: If currency not supported
         """
-        currency_upper = currency.upper()
-
-        if currency_upper == 'EURC':
-            return self.eurc_mint
-        elif currency_upper == 'USDC':
-            return self.usdc_mint
-        else:
+        # Currencies are stored upper-case, so normalising is only a fallback
+        mint = self._mint_by_currency.get(currency) or self._mint_by_currency.get(currency.upper())
+        if mint is None:
             raise ValueError(f"Unsupported currency: {currency}")
+        return mint
+
+    def _ensure_solana_context(self):
+        """
+        Build the Solana RPC client and parse the distribution key material.
+
+        These only depend on configuration, so they are created once and shared
+        by every withdrawal. Reusing the client also keeps its HTTP session
+        (and the underlying keep-alive connection) open between RPC calls.
+
+        Transfer pool workers call this concurrently; the lock makes sure only
+        one of them builds the context and the others wait for it.
+        """
+        if self._solana_client is not None:
+            return
+
+        with self._solana_context_lock:
+            if self._solana_client is None:
+                self._build_solana_context()
+
+    def _build_solana_context(self):
+        """Build the Solana context; called by _ensure_solana_context under its lock."""
+        distribution_keypair = Keypair.from_base58_string(self.distribution_private_key)
+        distribution_pubkey = distribution_keypair.pubkey()
+        mint_pubkeys = {
+            currency: Pubkey.from_string(mint)
+            for currency, mint in self._mint_by_currency.items()
+        }
+
+        self._distribution_keypair = distribution_keypair
+        self._distribution_pubkey = distribution_pubkey
+        self._mint_pubkeys = mint_pubkeys
+        self._distribution_ata = {
+            currency: get_associated_token_address(distribution_pubkey, mint_pubkey)
+            for currency, mint_pubkey in mint_pubkeys.items()
+        }
+        self._transfer_builders = {
+            currency: self._make_transfer_builder(mint_pubkey, self._distribution_ata[currency])
+            for currency, mint_pubkey in mint_pubkeys.items()
+        }
+        # Assigned last so a failure above is retried on the next transaction
+        self._solana_client = self._make_solana_client()
+
+    def _make_solana_client(self) -> Client:
+        """
+        Create the Solana RPC client with an explicit timeout.
+
+        The client keeps one keep-alive HTTP session for its lifetime, whose
+        default pool (20 idle connections) already covers the concurrent
+        transfers, so it's configured only through the public constructor.
+
+        Returns:
+            Solana RPC client
+        """
+        return Client(self.solana_rpc_url, timeout=self.solana_rpc_timeout)
+
+    def _make_transfer_builder(self, mint_pubkey, source_token_account):
+        """
+        Create a function that builds the instructions of a transfer for one token.
+
+        Everything that only depends on the currency (mint, distribution token
+        account and payer) is bound once here, so each withdrawal only supplies
+        what varies. Keeping the instruction order in one place also makes it
+        easier to audit.
+
+        Args:
+            mint_pubkey: Token mint Pubkey
+            source_token_account: Distribution wallet's token account for the mint
+
+        Returns:
+            Callable taking (recipient_pubkey, amount_in_smallest_unit, memo,
+            create_recipient_account) and returning the transfer's instructions
+        """
+        payer = self._distribution_pubkey
+
+        # Only the destination and amount of a transfer_checked vary per
+        # withdrawal, so its other accounts are encoded once here
+        source_meta = AccountMeta(source_token_account, is_signer=False, is_writable=True)
+        mint_meta = AccountMeta(mint_pubkey, is_signer=False, is_writable=False)
+        owner_meta = AccountMeta(payer, is_signer=True, is_writable=False)
+
+        def build_transfer(
+                recipient_pubkey, amount_in_smallest_unit, memo=None, create_recipient_account=True
+        ):
+            recipient_token_account = get_associated_token_address(recipient_pubkey, mint_pubkey)
+
+            # Create the recipient token account if it may not exist yet. The
+            # idempotent variant is a no-op for existing accounts, which saves
+            # an RPC round-trip to check for the account first.
+            instructions = []
+            if create_recipient_account:
+                instructions.append(
+                    create_idempotent_associated_token_account(
+                        payer=payer,
+                        owner=recipient_pubkey,
+                        mint=mint_pubkey,
+                    )
+                )
+
+            # Add memo instruction if memo is provided
+            if memo:
+                instructions.append(
+                    create_memo(
+                        MemoParams(
+                            program_id=MEMO_PROGRAM_ID,
+                            signer=payer,
+                            message=memo.encode('utf-8')
+                        )
+                    )
+                )
+
+            # Equivalent to spl.token transfer_checked() for a single owner
+            instructions.append(
+                Instruction(
+                    TOKEN_PROGRAM_ID,
+                    _TRANSFER_CHECKED_LAYOUT.pack(
+                        _TRANSFER_CHECKED_INDEX, amount_in_smallest_unit, TOKEN_DECIMALS
+                    ),
+                    [
+                        source_meta,
+                        mint_meta,
+                        AccountMeta(recipient_token_account, is_signer=False, is_writable=True),
+                        owner_meta,
+                    ],
+                )
+            )
+            return instructions
+
+        return build_transfer
+
+    def _transfer_instructions(self, transfer: Dict[str, Any]) -> list:
+        """
+        Build the instructions for one transfer.
+
+        Args:
+            transfer: Transfer arguments from _prepare_transfer
+
+        Returns:
+            List of Solana instructions
+
+        Raises:
+            ValueError: If the currency is not supported
+        """
+        currency = transfer['currency']
+        build_transfer = self._transfer_builders.get(currency) or self._transfer_builders.get(currency.upper())
+        if build_transfer is None:
+            raise ValueError(f"Unsupported currency: {transfer['currency']}")
+
+        return build_transfer(
+            Pubkey.from_string(transfer['recipient_address']),
+            transfer['amount_in_smallest_unit'],
+            transfer.get('memo'),
+            transfer.get('create_recipient_account', True),
+        )
+
+    def _sign_transaction(self, instructions: list, recent_blockhash) -> SolanaTransaction:
+        """
+        Sign instructions into a transaction paid for by the distribution wallet.
+
+        Args:
+            instructions: Solana instructions to include
+            recent_blockhash: Blockhash to sign with
+
+        Returns:
+            Signed Solana transaction
+        """
+        return SolanaTransaction.new_signed_with_payer(
+            instructions,
+            self._distribution_pubkey,
+            [self._distribution_keypair],
+            recent_blockhash
+        )
+
+    def _send_instructions(self, instructions: list, recent_blockhash):
+        """
+        Sign and send instructions as one Solana transaction.
+
+        If the RPC node rejects the blockhash, the transaction is re-signed with
+        a fresh one and sent once more.
+
+        Args:
+            instructions: Solana instructions to include
+            recent_blockhash: Blockhash to sign with
+
+        Returns:
+            RPC response of the send
+        """
+        transaction = self._sign_transaction(instructions, recent_blockhash)
+        try:
+            # Send transaction (serialize using bytes())
+            return self._solana_client.send_raw_transaction(bytes(transaction))
+        except RPCException as e:
+            if 'blockhash not found' not in str(e).lower():
+                raise
+            # The cached blockhash was rejected; re-sign with a fresh one and retry once
+            self.logger.warning(f"Blockhash {recent_blockhash} not found, retrying with a new one")
+            self._invalidate_blockhash()
+            transaction = self._sign_transaction(instructions, self._recent_blockhash())
+            return self._solana_client.send_raw_transaction(bytes(transaction))
+
+    def _recent_blockhash(self):
+        """
+        Return a recent blockhash, fetching a new one once the cached one is stale.
+
+        Returns:
+            Blockhash to sign transactions with
+        """
+        with self._blockhash_lock:
+            if (
+                self._blockhash_cache is None
+                or time.monotonic() - self._blockhash_ts > self._blockhash_ttl
+            ):
+                self._blockhash_cache = self._solana_client.get_latest_blockhash().value.blockhash
+                self._blockhash_ts = time.monotonic()
+            return self._blockhash_cache
+
+    def _invalidate_blockhash(self):
+        """Drop the cached blockhash so the next transaction fetches a fresh one."""
+        with self._blockhash_lock:
+            self._blockhash_cache = None
+
+    def _transfer_success(
+            self,
+            transfer: Dict[str, Any],
+            signature: str,
+            token_account_closed: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Build the result of a transfer that was sent successfully.
+
+        Args:
+            transfer: Transfer arguments from _prepare_transfer
+            signature: Signature of the Solana transaction carrying the transfer
+            token_account_closed: Whether the recipient's token account, believed
+                to exist, was found closed and had to be created again
+
+        Returns:
+            Dict with transaction result
+        """
+        return {
+            "status": "success",
+            "transaction_signature": signature,
+            "message": "Transaction sent successfully",
+            "token_account_closed": token_account_closed,
+            "details": {
+                "from_address": str(self._distribution_pubkey),
+                "to_address": transfer['recipient_address'],
+                "amount_in_smallest_unit": transfer['amount_in_smallest_unit'],
+                "currency": transfer['currency'],
+                "token_mint": transfer['token_mint'],
+            }
+        }
+
+    @staticmethod
+    def _transfer_error(error: Exception, token_account_closed: bool = False) -> Dict[str, Any]:
+        """
+        Build the result of a transfer that could not be sent.
+
+        Args:
+            error: Exception raised while sending
+            token_account_closed: Whether the recipient's token account, believed
+                to exist, was found closed
+
+        Returns:
+            Dict with transaction result
+        """
+        return {
+            "status": "error",
+            "message": str(error),
+            "transaction_signature": None,
+            "details": None,
+            "token_account_closed": token_account_closed,
+        }
+
+    @staticmethod
+    def _missing_token_account_instruction(error: Exception) -> Optional[int]:
+        """
+        Find the instruction that failed because its token account is missing.
+
+        Only the structured preflight error is inspected: an RPCException whose
+        simulation result failed with an InstructionError carrying one of
+        _MISSING_TOKEN_ACCOUNT_ERRORS. The error text is never matched.
+
+        Args:
+            error: Exception raised while sending
+
+        Returns:
+            Index of the failed instruction within the transaction, or None if
+            the error isn't a missing token account
+        """
+        if not isinstance(error, RPCException) or not error.args:
+            return None
+        # SendTransactionPreflightFailureMessage carries the simulation result
+        simulation = getattr(error.args[0], 'data', None)
+        transaction_error = getattr(simulation, 'err', None)
+        if not isinstance(transaction_error, TransactionErrorInstructionError):
+            return None
+        if transaction_error.err not in _MISSING_TOKEN_ACCOUNT_ERRORS:
+            return None
+        return transaction_error.index
 
     def _create_and_send_solana_transaction(
             self,
             recipient_address: str,
-            amount: float,
+            amount_in_smallest_unit: int,
             token_mint: str,
             currency: str,
-            memo: str = None
+            memo: str = None,
+            create_recipient_account: bool = True
     ) -> Dict[str, Any]:
         """
         Create and send a Solana token transfer transaction.
 
         Args:
             recipient_address: Recipient's Solana wallet address
-            amount: Amount to transfer (in token units)
+            amount_in_smallest_unit: Amount to transfer in the token's smallest unit
             token_mint: Token mint address
             currency: Currency code for logging
             memo: Optional memo text to include in transaction (e.g., transaction reference)
+            create_recipient_account: Whether to include the instruction creating the
+                recipient's token account; skipped for recipients known to have one
 
         Returns:
             Dict with transaction result
         """
+        transfer = {
+            "recipient_address": recipient_address,
+            "amount_in_smallest_unit": amount_in_smallest_unit,
+            "token_mint": token_mint,
+            "currency": currency,
+            "memo": memo,
+            "create_recipient_account": create_recipient_account,
+        }
+        token_account_closed = False
+
         try:
-            from solana.rpc.api import Client
-            from solders.keypair import Keypair
-            from solders.pubkey import Pubkey
-            from solders.transaction import Transaction as SolanaTransaction
-            from solders.instruction import Instruction
-            from solders.system_program import ID as SYSTEM_PROGRAM_ID
-            from spl.token.instructions import (
-                get_associated_token_address,
-                create_associated_token_account,
-                transfer_checked,
-                TransferCheckedParams,
+            # Reuse the cached client, key material and per-currency builder
+            self._ensure_solana_context()
+
+            # Fetch the blockhash while the instructions are being built
+            blockhash_future = self._rpc_executor.submit(self._recent_blockhash)
+
+            self.logger.debug(
+                "Creating Solana transaction: %s %s base units %s -> %s memo=%s on %s",
+                amount_in_smallest_unit, currency, self._distribution_pubkey,
+                recipient_address, memo, self.solana_rpc_url
             )
-            from spl.token.constants import TOKEN_PROGRAM_ID
-            from spl.memo.constants import MEMO_PROGRAM_ID
-            from spl.memo.instructions import MemoParams, create_memo
 
-            # Initialize Solana client
-            client = Client(self.solana_rpc_url)
+            instructions = self._transfer_instructions(transfer)
+            recent_blockhash = blockhash_future.result()
+            try:
+                result = self._send_instructions(instructions, recent_blockhash)
+            except Exception as e:
+                # transfer_checked is the transfer's last instruction
+                if (create_recipient_account
+                        or self._missing_token_account_instruction(e) != len(instructions) - 1):
+                    raise
+                # The token account known for this wallet was closed; create it
+                # again and retry once
+                self.logger.warning(
+                    f"Token account of {recipient_address} for {currency} is missing, recreating it"
+                )
+                token_account_closed = True
+                transfer = {**transfer, "create_recipient_account": True}
+                result = self._send_instructions(self._transfer_instructions(transfer), recent_blockhash)
+            self.logger.debug("Solana transaction sent: %s", result.value)
 
-            # Parse keypairs and addresses
-            distribution_keypair = Keypair.from_base58_string(self.distribution_private_key)
-            distribution_pubkey = distribution_keypair.pubkey()
-            recipient_pubkey = Pubkey.from_string(recipient_address)
-            mint_pubkey = Pubkey.from_string(token_mint)
+            return self._transfer_success(transfer, str(result.value), token_account_closed)
 
-            self.logger.info(
-                f"Creating Solana transaction: {amount} {currency} {distribution_pubkey} -> {recipient_address} on {self.solana_rpc_url}"
-            )
+        except Exception as e:
+            self.logger.exception(f"Error creating Solana transaction: {e}")
+            return self._transfer_error(e, token_account_closed)
 
-            # Token has 6 decimals
-            decimals = 6
-            amount_in_smallest_unit = int(amount * (10 ** decimals))
+    def _create_and_send_solana_transfers(self, transfers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send several transfers, packing as many as fit into each Solana transaction.
 
-            # Get associated token accounts
-            distribution_token_account = get_associated_token_address(
-                distribution_pubkey,
-                mint_pubkey
-            )
-            recipient_token_account = get_associated_token_address(
-                recipient_pubkey,
-                mint_pubkey
-            )
+        Transfers are added to a transaction in order until it would exceed the
+        packet size limit, then the next transaction is started. Transfers that
+        share a transaction succeed or fail together and get the same signature.
 
-            # Check if recipient token account exists
-            recipient_account_info = client.get_account_info(recipient_token_account)
+        Args:
+            transfers: Transfer arguments from _prepare_transfer
 
-            # Build instructions list
-            instructions = []
+        Returns:
+            Transaction result for each transfer, in the same order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(transfers)
 
-            # Add memo instruction if memo is provided
-            if memo:
-                self.logger.info(f"Adding memo to transaction: {memo}")
-                memo_ix = create_memo(
-                    MemoParams(
-                        program_id=MEMO_PROGRAM_ID,
-                        signer=distribution_pubkey,
-                        message=memo.encode('utf-8')
-                    )
-                )
-                instructions.append(memo_ix)
+        try:
+            self._ensure_solana_context()
+            recent_blockhash = self._recent_blockhash()
+        except Exception as e:
+            self.logger.exception(f"Error preparing Solana transaction: {e}")
+            return [self._transfer_error(e) for _ in transfers]
 
-            # If recipient doesn't have a token account, create it
-            if not recipient_account_info.value:
-                self.logger.info(
-                    f"Creating token account for recipient: {recipient_token_account}"
-                )
-                create_account_ix = create_associated_token_account(
-                    payer=distribution_pubkey,
-                    owner=recipient_pubkey,
-                    mint=mint_pubkey,
-                )
-                instructions.append(create_account_ix)
-
-            # Add transfer instruction
-            transfer_ix = transfer_checked(
-                TransferCheckedParams(
-                    program_id=TOKEN_PROGRAM_ID,
-                    source=distribution_token_account,
-                    mint=mint_pubkey,
-                    dest=recipient_token_account,
-                    owner=distribution_pubkey,
-                    amount=amount_in_smallest_unit,
-                    decimals=decimals,
-                )
+        # Group transfers into transactions that stay under the size limit
+        packed: List[Tuple[List[int], list]] = []
+        instruction_counts: Dict[int, int] = {}
+        for index, transfer in enumerate(transfers):
+            try:
+                instructions = self._transfer_instructions(transfer)
+            except Exception as e:
+                self.logger.exception(f"Error creating Solana transfer for [{transfer.get('memo')}]: {e}")
+                results[index] = self._transfer_error(e)
+                continue
+            instruction_counts[index] = len(instructions)
+
+            if packed:
+                indices, packed_instructions = packed[-1]
+                candidate = packed_instructions + instructions
+                try:
+                    probe = self._sign_transaction(candidate, recent_blockhash)
+                    fits = len(bytes(probe)) <= SOLANA_MAX_TRANSACTION_SIZE
+                except Exception as e:
+                    # The combination can't be built; send this transfer on its own
+                    self.logger.debug("Transfer [%s] not packed: %s", transfer.get('memo'), e)
+                    fits = False
+                if fits:
+                    packed[-1] = (indices + [index], candidate)
+                    continue
+            packed.append(([index], instructions))
+
+        for indices, instructions in packed:
+            self.logger.debug(
+                "Creating Solana transaction with %s transfer(s): %s",
+                len(indices), [transfers[i].get('memo') for i in indices]
             )
-            instructions.append(transfer_ix)
+            # Transfers relying on a token account known to exist
+            skipped = {i for i in indices if not transfers[i].get('create_recipient_account', True)}
+            closed = set()
+            try:
+                try:
+                    result = self._send_instructions(instructions, recent_blockhash)
+                except Exception as e:
+                    # Each transfer's transfer_checked is its last instruction
+                    transfer_checked_at = {
+                        end - 1: index
+                        for end, index in zip(accumulate(instruction_counts[i] for i in indices), indices)
+                    }
+                    closed_index = transfer_checked_at.get(self._missing_token_account_instruction(e))
+                    if closed_index not in skipped:
+                        raise
+                    # That transfer's token account was closed. Others in the
+                    # transaction may be too, so every skipped create is added
+                    # back for the single retry.
+                    self.logger.warning(
+                        f"Token account missing for [{transfers[closed_index].get('memo')}], recreating: {e}"
+                    )
+                    closed = {closed_index}
+                    instructions = [
+                        instruction
+                        for index in indices
+                        for instruction in self._transfer_instructions(
+                            {**transfers[index], "create_recipient_account": True}
+                        )
+                    ]
+                    result = self._send_instructions(instructions, recent_blockhash)
+                self.logger.debug("Solana transaction sent: %s", result.value)
+                for index in indices:
+                    results[index] = self._transfer_success(
+                        transfers[index], str(result.value), index in closed
+                    )
+            except Exception as e:
+                self.logger.exception(f"Error creating Solana transaction: {e}")
+                for index in indices:
+                    results[index] = self._transfer_error(e, index in closed)
 
-            # Get recent blockhash
-            recent_blockhash = client.get_latest_blockhash().value.blockhash
+        return results
 
-            # Create transaction with instructions and payer
-            transaction = SolanaTransaction.new_with_payer(
-                instructions,
-                distribution_pubkey
-            )
+    def _get_service_token(self):
+        """
+        Return the cached service token, acquiring a new one when it is close to expiry.
 
-            # Sign transaction with recent blockhash
-            transaction.sign([distribution_keypair], recent_blockhash)
+        The token's own expires_in is used as its lifetime when the identity
+        service provides one, otherwise a fixed TTL is assumed.
 
-            # Send transaction (serialize using bytes())
-            result = client.send_raw_transaction(bytes(transaction))
-
-            self.logger.info(f"Solana transaction sent: {result.value}")
-
-            return {
-                "status": "success",
-                "transaction_signature": str(result.value),
-                "message": "Transaction sent successfully",
-                "details": {
-                    "from_address": str(distribution_pubkey),
-                    "to_address": recipient_address,
-                    "amount": amount,
-                    "currency": currency,
-                    "token_mint": token_mint,
-                }
-            }
+        Returns:
+            Service token from the identity service
+        """
+        with self._service_token_lock:
+            now = time.monotonic()
+            if self._service_token is None or now >= self._service_token_expiry:
+                token = self.identity_service.acquire_token()
+                expires_in = getattr(token, 'expires_in', None)
+                ttl = expires_in if isinstance(expires_in, (int, float)) else self._service_token_ttl
+                self._service_token = token
+                self._service_token_expiry = now + ttl - self._service_token_refresh_margin
+                self.logger.debug("Acquired service token for status updates")
+            return self._service_token
+
+    def _invalidate_service_token(self):
+        """Force the next status update to acquire a fresh service token."""
+        with self._service_token_lock:
+            self._service_token = None
+            self._service_token_expiry = 0.0
+
+    @staticmethod
+    def _create_status_message(payload, instruction_type, idempotency_key: str, service_token):
+        """
+        Build the message bus message carrying a status payload.
 
-        except Exception as e:
-            self.logger.exception(f"Error creating Solana transaction: {e}")
-            return {
-                "status": "error",
-                "message": str(e),
-                "transaction_signature": None,
-                "details": None
-            }
+        Args:
+            payload: The payload to send
+            instruction_type: InstructionType matching the payload
+            idempotency_key: Key the consumer deduplicates resends by
+            service_token: Service token authenticating the message
+
+        Returns:
+            MessageBusMessage ready to send
+        """
+        return MessageBusMessage.create(
+            source="MYKOBO_DAPP",
+            instruction_type=instruction_type,
+            payload=payload,
+            service_token=service_token.token,
+            idempotency_key=idempotency_key
+        )
 
     def _send_status_update(
         self,
         payload: Union[PaymentPayload, StatusUpdatePayload, CorrectionPayload],
-        reference: Optional[str] = None
+        reference: Optional[str] = None,
+        outbox: Optional[List[Dict[str, Any]]] = None
     ):
         """
         Send status update message to queue.
@@ -521,6 +1454,8 @@ class TransactionProcessor:
         Args:
             payload: The payload to send (PaymentPayload, StatusUpdatePayload, or CorrectionPayload)
             reference: Optional transaction reference for logging (extracted from payload if not provided)
+            outbox: Optional list to queue the built message on instead of sending it.
+                Queued messages are sent in batches by _flush_status_updates.
         """
         try:
             # Extract reference for logging
@@ -540,8 +1475,7 @@ class TransactionProcessor:
                 raise ValueError(error_msg)
 
             try:
-                service_token = self.identity_service.acquire_token()
-                self.logger.debug("Acquired service token for status update")
+                service_token = self._get_service_token()
             except Exception as e:
                 error_msg = f"Failed to acquire service token for [{reference}]: {e}"
                 self.logger.error(error_msg)
@@ -553,36 +1487,56 @@ class TransactionProcessor:
                 instruction_type = InstructionType.PAYMENT
                 message_type = "payment"
                 target_queue = self.payment_queue_name
+                idempotency_suffix = "payment"
             elif isinstance(payload, StatusUpdatePayload):
                 instruction_type = InstructionType.STATUS_UPDATE
                 message_type = "status update"
                 target_queue =  self.status_update_queue_name
+                idempotency_suffix = f"status-{payload.status}"
             elif isinstance(payload, CorrectionPayload):
                 instruction_type = InstructionType.CORRECTION
                 message_type = "correction"
                 target_queue = self.correction_queue_name
+                idempotency_suffix = "correction"
             else:
                 raise ValueError(f"Unsupported payload type: {type(payload)}")
 
+            # Derived from the reference, so a resend of the same outcome can be
+            # deduplicated by the consumer
+            idempotency_key = f"{reference}-{idempotency_suffix}" if reference else str(uuid.uuid4())
+
             # Create message
-            message = MessageBusMessage.create(
-                source="MYKOBO_DAPP",
-                instruction_type=instruction_type,
-                payload=payload,
-                service_token=service_token.token,
-                idempotency_key=None
+            message = self._create_status_message(
+                payload, instruction_type, idempotency_key, service_token
             )
 
+            if outbox is not None:
+                outbox.append({
+                    "message": message,
+                    "payload": payload,
+                    "instruction_type": instruction_type,
+                    "idempotency_key": idempotency_key,
+                    "queue": target_queue,
+                    "reference": reference,
+                    "message_type": message_type,
+                })
+                return
+
             # Send message to status update queue
             self.logger.info(
                 f"Sending {message_type} message for [{reference}] to queue: {target_queue}"
             )
 
-            response = self.message_bus.send_message(
-                message,
-                target_queue,
-                "DAPP.transaction_processor"
-            )
+            try:
+                response = self.message_bus.send_message(
+                    message,
+                    target_queue,
+                    "DAPP.transaction_processor"
+                )
+            except Exception:
+                # The token may have been revoked; don't reuse it for the next message
+                self._invalidate_service_token()
+                raise
 
             self.logger.info(
                 f"{message_type.capitalize()} message sent for [{reference}]: Message ID: {response.get('MessageId')}"
@@ -602,6 +1556,64 @@ class TransactionProcessor:
             )
             # Don't raise - non-critical status update failures shouldn't fail the transaction processing
 
+    def _flush_status_updates(self, outbox: List[Dict[str, Any]]):
+        """
+        Send the status update messages queued during a batch.
+
+        Messages are grouped by target queue and sent in batches. Any message
+        the batch send rejects is rebuilt with a fresh service token and retried
+        once on its own; failures after that are logged but, as with single
+        sends, don't fail the processing.
+
+        Args:
+            outbox: Entries queued by _send_status_update
+        """
+        by_queue: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in outbox:
+            by_queue.setdefault(entry["queue"], []).append(entry)
+
+        for target_queue, entries in by_queue.items():
+            self.logger.info(
+                f"Sending {len(entries)} status message(s) to queue: {target_queue}"
+            )
+            try:
+                failed = send_message_batch(
+                    self.message_bus,
+                    [entry["message"] for entry in entries],
+                    target_queue,
+                    "DAPP.transaction_processor"
+                )
+            except Exception as e:
+                self.logger.exception(f"Error sending status messages to {target_queue}: {e}")
+                failed = [(entry["message"], e) for entry in entries]
+
+            if not failed:
+                continue
+
+            # Send failures may be down to a revoked token
+            self._invalidate_service_token()
+            failed_messages = {id(message) for message, _ in failed}
+            for entry in entries:
+                if id(entry["message"]) not in failed_messages:
+                    continue
+                try:
+                    # The queued message carries the token that may have been revoked
+                    message = self._create_status_message(
+                        entry["payload"],
+                        entry["instruction_type"],
+                        entry["idempotency_key"],
+                        self._get_service_token()
+                    )
+                    self.message_bus.send_message(
+                        message,
+                        target_queue,
+                        "DAPP.transaction_processor"
+                    )
+                except Exception as e:
+                    self.logger.exception(
+                        f"Error sending {entry['message_type']} for [{entry['reference']}]: {e}"
+                    )
+
 
 def create_processor(env: str = 'development') -> TransactionProcessor:
     """
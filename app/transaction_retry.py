@@ -1,32 +1,105 @@
 """
 Utility functions for retrying failed transaction queue sends.
 """
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 from flask import current_app as app
 from mykobo_py.message_bus import MessageBusMessage, InstructionType, TransactionPayload
-from sqlalchemy import and_
+from sqlalchemy import func, inspect, lambda_stmt, select, update
+from sqlalchemy.orm import load_only
 
 from app.database import db
+from app.message_bus import publish_messages
 from app.models import Transaction
 
 
-def get_unsent_transactions(limit: int = 100) -> List[Transaction]:
+# Columns used by the ledger message of a retried transaction
+_RETRY_COLUMNS = (
+    Transaction.id,
+    Transaction.reference,
+    Transaction.idempotency_key,
+    Transaction.source,
+    Transaction.first_name,
+    Transaction.last_name,
+    Transaction.transaction_type,
+    Transaction.status,
+    Transaction.incoming_currency,
+    Transaction.outgoing_currency,
+    Transaction.value,
+    Transaction.fee,
+    Transaction.payer_id,
+    Transaction.payee_id,
+    Transaction.message_id,
+    Transaction.created_at,
+)
+
+
+# The retry worker runs these on every cycle; as lambda statements their SQL
+# is compiled once and the limit and status are only bound per call
+_UNSENT_STMT = lambda_stmt(
+    lambda: select(Transaction)
+    .options(load_only(*_RETRY_COLUMNS))
+    .where(Transaction.message_id.is_(None))
+    .order_by(Transaction.created_at.asc())
+)
+
+_UNSENT_BY_STATUS_STMT = lambda_stmt(
+    lambda: select(Transaction)
+    .where(Transaction.message_id.is_(None))
+    .order_by(Transaction.created_at.asc())
+)
+
+# TransactionPayload field -> Transaction attribute
+_PAYLOAD_FIELDS = (
+    ('external_reference', 'id'),
+    ('source', 'source'),
+    ('reference', 'reference'),
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+    ('transaction_type', 'transaction_type'),
+    ('status', 'status'),
+    ('incoming_currency', 'incoming_currency'),
+    ('outgoing_currency', 'outgoing_currency'),
+    ('value', 'value'),
+    ('fee', 'fee'),
+    ('payer', 'payer_id'),
+    ('payee', 'payee_id'),
+)
+
+
+def get_unsent_transactions(limit: int = 100, skip_locked: bool = False) -> List[Transaction]:
     """
     Get transactions that have been saved to database but not sent to queue.
 
     Args:
         limit: Maximum number of transactions to retrieve
+        skip_locked: Lock the returned rows (FOR UPDATE SKIP LOCKED) so that
+            concurrent retry workers each claim a different set
+
+    Only the columns needed to rebuild the ledger message (and list the
+    transactions) are loaded; anything else is loaded on access.
 
     Returns:
         List of Transaction objects where message_id is NULL
     """
-    return Transaction.query.filter(
-        Transaction.message_id.is_(None)
-    ).order_by(
-        Transaction.created_at.asc()
-    ).limit(limit).all()
+    stmt = _UNSENT_STMT + (lambda s: s.limit(limit))
+    if skip_locked:
+        stmt += lambda s: s.with_for_update(skip_locked=True)
+    return db.session.scalars(stmt).all()
+
+
+def has_unsent_transactions() -> bool:
+    """
+    Check whether any transaction is waiting to be sent to the queue.
+
+    Returns:
+        True if at least one transaction has no message_id
+    """
+    return db.session.execute(
+        select(Transaction.id).where(Transaction.message_id.is_(None)).limit(1)
+    ).first() is not None
 
 
 def get_failed_transactions_by_status(status: str, limit: int = 100) -> List[Transaction]:
@@ -40,22 +113,106 @@ def get_failed_transactions_by_status(status: str, limit: int = 100) -> List[Tra
     Returns:
         List of Transaction objects
     """
-    return Transaction.query.filter(
-        and_(
-            Transaction.status == status,
-            Transaction.message_id.is_(None)
-        )
-    ).order_by(
-        Transaction.created_at.asc()
-    ).limit(limit).all()
+    return db.session.scalars(
+        _UNSENT_BY_STATUS_STMT
+        + (lambda s: s.where(Transaction.status == status))
+        + (lambda s: s.limit(limit))
+    ).all()
+
 
+# Source identifier for ledger messages sent by the retry job
+RETRY_SOURCE = "DAPP.transaction_retry"
 
-def retry_transaction(transaction: Transaction) -> Dict[str, Any]:
+# Service tokens are reused until shortly before they expire
+SERVICE_TOKEN_TTL = 300  # seconds, unless the token says otherwise
+SERVICE_TOKEN_REFRESH_MARGIN = 30  # seconds
+
+
+def _cached_service_token(identity_service):
+    """
+    Return the app's cached service token, acquiring a new one when it is close to expiry.
+
+    The cache lives in app.extensions, so it is shared by every retry run of
+    the app and starts empty for a new app or identity service client.
+
+    Args:
+        identity_service: Identity service client
+
+    Returns:
+        Service token from the identity service
+    """
+    cache = app.extensions.setdefault('transaction_retry_token', {})
+    now = time.monotonic()
+    if cache.get('client') is not identity_service or now >= cache.get('expires_at', 0.0):
+        token = identity_service.acquire_token()
+        expires_in = getattr(token, 'expires_in', None)
+        ttl = expires_in if isinstance(expires_in, (int, float)) else SERVICE_TOKEN_TTL
+        cache.update(client=identity_service, token=token, expires_at=now + ttl - SERVICE_TOKEN_REFRESH_MARGIN)
+    return cache['token']
+
+
+def _acquire_service_token(identity_service, reference: str) -> Tuple[Any, Optional[str]]:
+    """
+    Acquire a service token for sending transactions to the queue.
+
+    Args:
+        identity_service: Identity service client, or None if not configured
+        reference: Transaction reference (or a description of the batch), used in error messages
+
+    Returns:
+        Tuple of (service token, None) on success or (None, error message)
+    """
+    if not identity_service:
+        error_msg = f"Identity service not configured, cannot retry transaction [{reference}]"
+        app.logger.error(error_msg)
+        return None, error_msg
+
+    try:
+        service_token = _cached_service_token(identity_service)
+        app.logger.debug("Acquired service token for retry of transaction [%s]", reference)
+        return service_token, None
+    except Exception as e:
+        error_msg = f"Failed to acquire service token for [{reference}]: {e}"
+        app.logger.error(error_msg)
+        return None, error_msg
+
+
+def _build_ledger_message(transaction: Transaction, service_token) -> MessageBusMessage:
+    """
+    Reconstruct the ledger message for a transaction record.
+
+    Args:
+        transaction: Transaction object to send
+        service_token: Service token to authenticate the message with
+
+    Returns:
+        MessageBusMessage for the transaction queue
+    """
+    # Read loaded values straight from the instance state; only attributes
+    # that are not loaded go through the instrumented getattr
+    loaded = inspect(transaction).dict
+    transaction_payload = TransactionPayload(**{
+        field: loaded[attribute] if attribute in loaded else getattr(transaction, attribute)
+        for field, attribute in _PAYLOAD_FIELDS
+    })
+
+    return MessageBusMessage.create(
+        source="DAPP",
+        instruction_type=InstructionType.TRANSACTION,
+        payload=transaction_payload,
+        service_token=service_token.token,
+        # Reuse the transaction's key so the ledger can spot the resend
+        idempotency_key=transaction.idempotency_key
+    )
+
+
+def retry_transaction(transaction: Transaction, service_token=None) -> Dict[str, Any]:
     """
     Retry sending a transaction to the queue.
 
     Args:
         transaction: Transaction object to retry
+        service_token: Optional service token to send with; acquired if not given
 
     Returns:
         Dict with status and details:
@@ -67,58 +224,24 @@ def retry_transaction(transaction: Transaction) -> Dict[str, Any]:
     """
     try:
         # Acquire service token - REQUIRED for sending to queue
-        identity_service = app.config.get("IDENTITY_SERVICE_CLIENT")
-        if not identity_service:
-            error_msg = f"Identity service not configured, cannot retry transaction [{transaction.reference}]"
-            app.logger.error(error_msg)
-            return {
-                'success': False,
-                'message_id': None,
-                'error': error_msg
-            }
-
-        try:
-            service_token = identity_service.acquire_token()
-            app.logger.debug(f"Acquired service token for retry of transaction [{transaction.reference}]")
-        except Exception as e:
-            error_msg = f"Failed to acquire service token for [{transaction.reference}]: {e}"
-            app.logger.error(error_msg)
-            return {
-                'success': False,
-                'message_id': None,
-                'error': error_msg
-            }
-
-        transaction_payload = TransactionPayload(
-            external_reference=transaction.id,
-            source=transaction.source,
-            reference=transaction.reference,
-            first_name=transaction.first_name,
-            last_name=transaction.last_name,
-            transaction_type=transaction.transaction_type,
-            status=transaction.status,
-            incoming_currency=transaction.incoming_currency,
-            outgoing_currency=transaction.outgoing_currency,
-            value=transaction.value,
-            fee=transaction.fee,
-            payer=transaction.payer_id,
-            payee=transaction.payee_id,
-        )
-
-        ledger_payload = MessageBusMessage.create(
-            source="DAPP",
-            instruction_type=InstructionType.TRANSACTION,
-            payload=transaction_payload,
-            service_token=service_token.token,
-            idempotency_key=None
-        )
-        # Reconstruct ledger payload from transaction record
+        if service_token is None:
+            service_token, error_msg = _acquire_service_token(
+                app.config.get("IDENTITY_SERVICE_CLIENT"), transaction.reference
+            )
+            if error_msg:
+                return {
+                    'success': False,
+                    'message_id': None,
+                    'error': error_msg
+                }
+
+        ledger_payload = _build_ledger_message(transaction, service_token)
 
         # Send to queue
         queue_response = app.config["MESSAGE_BUS"].send_message(
             ledger_payload,
             app.config["TRANSACTION_QUEUE_NAME"],
-            "DAPP.transaction_retry",
+            RETRY_SOURCE,
         )
 
         # Update transaction with message ID
@@ -127,7 +250,8 @@ def retry_transaction(transaction: Transaction) -> Dict[str, Any]:
         db.session.commit()
 
         app.logger.info(
-            f"Successfully retried transaction [{transaction.reference}] - Message ID: {queue_response['MessageId']}"
+            "Successfully retried transaction [%s] - Message ID: %s",
+            transaction.reference, queue_response['MessageId']
         )
 
         return {
@@ -152,6 +276,11 @@ def retry_unsent_transactions(limit: int = 100) -> Dict[str, Any]:
     """
     Retry all unsent transactions.
 
+    The ledger messages are built first and sent with batched queue requests,
+    up to RETRY_CONCURRENCY of them in flight at once. The message IDs of the
+    sent transactions are then written with one bulk UPDATE and a single
+    commit.
+
     Args:
         limit: Maximum number of transactions to retry
 
@@ -161,36 +290,109 @@ def retry_unsent_transactions(limit: int = 100) -> Dict[str, Any]:
             'total': int,
             'succeeded': int,
             'failed': int,
-            'results': List[Dict]
+            'success_ids': List[str],
+            'failed_details': List[Dict]  # db_id, reference and error
         }
     """
-    unsent = get_unsent_transactions(limit)
+    # The rows stay locked until the commit below, so other workers skip them
+    unsent = get_unsent_transactions(limit, skip_locked=True)
+    # Captured up front; the commit expires the instances
+    references = [(transaction.id, transaction.reference) for transaction in unsent]
+
+    message_ids: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+
+    # One service token covers the whole run
+    service_token = None
+    if unsent:
+        service_token, error_msg = _acquire_service_token(
+            app.config.get("IDENTITY_SERVICE_CLIENT"), f"{len(unsent)} unsent transaction(s)"
+        )
+        if error_msg:
+            errors = {transaction.id: error_msg for transaction in unsent}
+
+    # Build every ledger message before sending anything
+    to_send = []
+    for transaction in unsent:
+        if service_token is None:
+            continue
+        try:
+            to_send.append((transaction, _build_ledger_message(transaction, service_token)))
+        except Exception as e:
+            app.logger.exception(f"Failed to retry transaction [{transaction.reference}]: {e}")
+            errors[transaction.id] = str(e)
+
+    if to_send:
+        transaction_by_message = {id(message): transaction for transaction, message in to_send}
+        try:
+            sent, failed = publish_messages(
+                app.config["MESSAGE_BUS"],
+                [message for _, message in to_send],
+                app.config["TRANSACTION_QUEUE_NAME"],
+                RETRY_SOURCE,
+                max_workers=app.config.get("RETRY_CONCURRENCY", 1),
+            )
+        except Exception as e:
+            app.logger.exception(f"Failed to send retried transactions: {e}")
+            sent, failed = [], [(message, e) for _, message in to_send]
+
+        for message, error in failed:
+            transaction = transaction_by_message[id(message)]
+            app.logger.error(f"Failed to retry transaction [{transaction.reference}]: {error}")
+            errors[transaction.id] = str(error)
+
+        for message, message_id in sent:
+            message_ids[transaction_by_message[id(message)].id] = message_id
+
+    if message_ids:
+        queue_sent_at = datetime.now()
+        try:
+            db.session.execute(
+                update(Transaction),
+                [
+                    {'id': transaction_id, 'message_id': message_id, 'queue_sent_at': queue_sent_at}
+                    for transaction_id, message_id in message_ids.items()
+                ]
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception(f"Failed to record retried transactions: {e}")
+            for transaction_id in message_ids:
+                errors[transaction_id] = str(e)
+            message_ids = {}
+    else:
+        # Nothing to record; end the transaction to release the row locks
+        db.session.rollback()
 
     results = {
         'total': len(unsent),
         'succeeded': 0,
         'failed': 0,
-        'results': []
+        'success_ids': [],
+        'failed_details': []
     }
 
-    for transaction in unsent:
-        result = retry_transaction(transaction)
-
-        if result['success']:
-            results['succeeded'] += 1
+    # Successes are only reported by id; failures carry the details
+    for transaction_id, reference in references:
+        if transaction_id in message_ids:
+            results['success_ids'].append(transaction_id)
+            app.logger.info(
+                "Successfully retried transaction [%s] - Message ID: %s", reference, message_ids[transaction_id]
+            )
         else:
-            results['failed'] += 1
+            results['failed_details'].append({
+                'db_id': transaction_id,
+                'reference': reference,
+                'error': errors.get(transaction_id)
+            })
 
-        results['results'].append({
-            'reference': transaction.reference,
-            'db_id': transaction.id,
-            'success': result['success'],
-            'message_id': result['message_id'],
-            'error': result['error']
-        })
+    results['succeeded'] = len(results['success_ids'])
+    results['failed'] = len(results['failed_details'])
 
     app.logger.info(
-        f"Retry summary: {results['succeeded']} succeeded, {results['failed']} failed out of {results['total']}"
+        "Retry summary: %s succeeded, %s failed out of %s",
+        results['succeeded'], results['failed'], results['total']
     )
 
     return results
@@ -209,22 +411,27 @@ def get_transaction_stats() -> Dict[str, int]:
             'by_status': Dict[str, int]
         }
     """
-    total = Transaction.query.count()
-    sent = Transaction.query.filter(Transaction.message_id.isnot(None)).count()
-    unsent = Transaction.query.filter(Transaction.message_id.is_(None)).count()
-
-    # Count by status
-    from sqlalchemy import func
-    status_counts = db.session.query(
-        Transaction.status,
-        func.count(Transaction.id)
-    ).group_by(Transaction.status).all()
-
-    by_status = {status: count for status, count in status_counts}
+    # One GROUP BY covers every count: rows per (status, sent) pair
+    rows = db.session.execute(
+        select(
+            Transaction.status,
+            Transaction.message_id.isnot(None).label('sent'),
+            func.count(Transaction.id)
+        ).group_by(Transaction.status, Transaction.message_id.isnot(None))
+    ).all()
+
+    total = 0
+    sent = 0
+    by_status: Dict[str, int] = {}
+    for status, is_sent, count in rows:
+        total += count
+        if is_sent:
+            sent += count
+        by_status[status] = by_status.get(status, 0) + count
 
     return {
         'total': total,
         'sent': sent,
-        'unsent': unsent,
+        'unsent': total - sent,
         'by_status': by_status
     }
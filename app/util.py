@@ -2,6 +2,16 @@ from time import time
 from typing import Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session so fee lookups reuse pooled connections instead of opening
+# (and TLS-handshaking) a new one per request
+_FEE_SESSION = requests.Session()
+_FEE_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=Retry(total=2, backoff_factor=0.1))
+_FEE_SESSION.mount("https://", _FEE_ADAPTER)
+_FEE_SESSION.mount("http://", _FEE_ADAPTER)
+FEE_REQUEST_TIMEOUT = (2, 5)  # (connect, read) seconds
 
 
 def retrieve_ip_address(request):
@@ -26,10 +36,11 @@ def generate_reference(prefix: str = "MYK") -> str:
 
 def get_fee(fee_endpoint: str, value: str, kind: str, client_domain: Optional[str]) -> Dict:
     try:
-        response = requests.get(
+        response = _FEE_SESSION.get(
             fee_endpoint,
             params={"value": value, "kind": kind, "client_domain": client_domain},
+            timeout=FEE_REQUEST_TIMEOUT,
         )
         return response.json()
     except requests.exceptions.RequestException as e:
-        raise ValueError("Error fetching fees: {e}")
+        raise ValueError(f"Error fetching fees: {e}")
@@ -16,6 +16,11 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+# Match CSS rules: selector { properties }
+# The character classes already span newlines, so one pattern serves both
+# the minified and the expanded parser
+_RULE_RE = re.compile(r'([^{}]+)\{([^{}]+)\}')
+
 
 def parse_minified_css(css_content: str) -> Dict[str, str]:
     """
@@ -25,18 +30,12 @@ def parse_minified_css(css_content: str) -> Dict[str, str]:
     """
     rules = {}
 
-    # Match CSS rules: selector { properties }
-    # This regex handles multiple selectors separated by commas
-    pattern = r'([^{}]+)\{([^{}]+)\}'
-
-    for match in re.finditer(pattern, css_content):
-        selector = match.group(1).strip()
-        properties = match.group(2).strip()
+    for match in _RULE_RE.finditer(css_content):
+        selector, properties = match.groups()
+        properties = properties.strip()
 
         # Split multiple selectors (e.g., ".class1, .class2")
-        selectors = [s.strip() for s in selector.split(',')]
-
-        for sel in selectors:
+        for sel in map(str.strip, selector.split(',')):
             rules[sel] = properties
 
     return rules
@@ -51,17 +50,12 @@ def parse_expanded_css(css_content: str) -> List[Tuple[str, str, str]]:
     rules = []
 
     # Match CSS rules with their full formatting
-    pattern = r'([^{}]+)\{([^{}]+)\}'
-
-    for match in re.finditer(pattern, css_content, re.DOTALL):
-        selector = match.group(1).strip()
-        properties_block = match.group(2)
+    for match in _RULE_RE.finditer(css_content):
+        selector, properties_block = match.groups()
         full_rule = match.group(0)
 
         # Handle multiple selectors
-        selectors = [s.strip() for s in selector.split(',')]
-
-        for sel in selectors:
+        for sel in map(str.strip, selector.split(',')):
             rules.append((sel, properties_block, full_rule))
 
     return rules
@@ -80,18 +74,17 @@ def format_css_rule(selector: str, properties: str) -> str:
     return f'{selector} {{\n{formatted_props}\n}}'
 
 
-def merge_css(main_css_path: Path, generated_css_path: Path) -> str:
+def merge_css(main_css: str, generated_css: str) -> str:
     """
     Merge generated CSS into main.css.
 
+    Takes the contents of both files, so main.css is only read once by the
+    caller.
+
     - Replaces matching selectors
     - Appends new selectors
     - Preserves main.css formatting
     """
-    # Read files
-    main_css = main_css_path.read_text()
-    generated_css = generated_css_path.read_text()
-
     # Parse CSS files
     generated_rules = parse_minified_css(generated_css)
     main_rules = parse_expanded_css(main_css)
@@ -121,14 +114,12 @@ def merge_css(main_css_path: Path, generated_css_path: Path) -> str:
             new_rule = format_css_rule(selector, properties)
             new_rules.append(new_rule)
 
-    # Combine results
-    result = '\n'.join(result_parts)
-
+    # Combine results with a single join
     if new_rules:
-        result += '\n/* New rules from generated CSS */\n'
-        result += '\n'.join(new_rules)
+        result_parts.append('/* New rules from generated CSS */')
+        result_parts.extend(new_rules)
 
-    return result
+    return '\n'.join(result_parts)
 
 
 def main():
@@ -148,13 +139,17 @@ def main():
         print(f"Error: Main CSS file not found: {main_css_path}")
         sys.exit(1)
 
+    # Read files
+    main_css = main_css_path.read_text()
+    generated_css = generated_css_path.read_text()
+
     # Backup main.css
     backup_path = main_css_path.with_suffix('.css.backup')
-    backup_path.write_text(main_css_path.read_text())
+    backup_path.write_text(main_css)
     print(f"Created backup: {backup_path}")
 
     # Merge CSS
-    merged_css = merge_css(main_css_path, generated_css_path)
+    merged_css = merge_css(main_css, generated_css)
 
     # Write result
     main_css_path.write_text(merged_css)
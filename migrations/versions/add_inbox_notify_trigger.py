@@ -0,0 +1,47 @@
+"""Notify listeners when a message is added to the inbox
+
+PostgreSQL only: on any other database upgrade and downgrade do nothing, and
+the transaction processor keeps polling on its fixed interval. Covered by
+tests/test_inbox_notify.py, which runs against TEST_POSTGRES_URL.
+
+Revision ID: add_inbox_notify_trigger
+Revises: add_inbox_pending_index
+Create Date: 2026-10-16 14:03:27.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_inbox_notify_trigger'
+down_revision = 'add_inbox_pending_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # LISTEN/NOTIFY is PostgreSQL only; a no-op elsewhere (e.g. SQLite)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dapp.notify_inbox_new() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('inbox_new', NEW.id::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER inbox_notify_new
+        AFTER INSERT ON dapp.inbox
+        FOR EACH ROW EXECUTE FUNCTION dapp.notify_inbox_new()
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS inbox_notify_new ON dapp.inbox")
+    op.execute("DROP FUNCTION IF EXISTS dapp.notify_inbox_new()")
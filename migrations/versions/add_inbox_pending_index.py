@@ -0,0 +1,40 @@
+"""Add partial index for pending inbox messages
+
+Revision ID: add_inbox_pending_index
+Revises: 71c30d32e708
+Create Date: 2026-10-16 10:12:41.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_inbox_pending_index'
+down_revision = '71c30d32e708'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so the consumer can keep writing to the inbox
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'inbox_pending_created_at',
+            'inbox',
+            ['created_at'],
+            unique=False,
+            schema='dapp',
+            postgresql_where=sa.text("status = 'pending'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'inbox_pending_created_at',
+            table_name='inbox',
+            schema='dapp',
+            postgresql_concurrently=True,
+        )
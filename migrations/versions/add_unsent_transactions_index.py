@@ -0,0 +1,40 @@
+"""Add partial index for unsent transactions
+
+Revision ID: add_unsent_transactions_index
+Revises: add_wallet_known_ata_table
+Create Date: 2026-10-16 16:41:27.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_unsent_transactions_index'
+down_revision = 'add_wallet_known_ata_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so the processor can keep writing transactions
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'transactions_unsent_created_at',
+            'transactions',
+            ['created_at'],
+            unique=False,
+            schema='dapp',
+            postgresql_where=sa.text("message_id IS NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'transactions_unsent_created_at',
+            table_name='transactions',
+            schema='dapp',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,31 @@
+"""add wallet known ata table
+
+Revision ID: add_wallet_known_ata_table
+Revises: add_inbox_notify_trigger
+Create Date: 2026-10-16 15:20:09.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_wallet_known_ata_table'
+down_revision = 'add_inbox_notify_trigger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create wallet_known_ata table
+    op.create_table('wallet_known_ata',
+    sa.Column('wallet_address', sa.String(length=255), nullable=False),
+    sa.Column('mint', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('wallet_address', 'mint'),
+    schema='dapp'
+    )
+
+
+def downgrade():
+    op.drop_table('wallet_known_ata', schema='dapp')
@@ -90,9 +90,8 @@ def retry_all():
 
     if results['failed'] > 0:
         print("\n=== Failed Transactions ===")
-        for result in results['results']:
-            if not result['success']:
-                print(f"  ID {result['db_id']} ({result['reference']}): {result['error']}")
+        for result in results['failed_details']:
+            print(f"  ID {result['db_id']} ({result['reference']}): {result['error']}")
 
 
 def main():
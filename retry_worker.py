@@ -13,13 +13,20 @@ Usage:
 """
 import os
 import sys
-import time
 import signal
+import threading
 import argparse
+import logging
 from datetime import datetime
 
 from app import create_app
-from app.transaction_retry import retry_unsent_transactions, get_transaction_stats
+from app.transaction_retry import (
+    retry_unsent_transactions,
+    has_unsent_transactions,
+    get_transaction_stats,
+)
+
+logger = logging.getLogger("retry_worker")
 
 
 class RetryWorker:
@@ -36,6 +43,8 @@ class RetryWorker:
         self.interval = interval
         self.max_retries_per_run = max_retries_per_run
         self.running = True
+        # Set on shutdown so the interval wait returns immediately
+        self._stop = threading.Event()
         self.total_retries = 0
         self.total_successes = 0
         self.total_failures = 0
@@ -49,43 +58,47 @@ class RetryWorker:
         env = os.getenv('ENV', 'production')
         self.app = create_app(env)
 
-        print(f"[{self._timestamp()}] Retry Worker initialized")
-        print(f"[{self._timestamp()}] Environment: {env}")
-        print(f"[{self._timestamp()}] Retry interval: {interval} seconds")
-        print(f"[{self._timestamp()}] Max retries per run: {max_retries_per_run}")
+        logger.info("Retry Worker initialized")
+        logger.info("Environment: %s", env)
+        logger.info("Retry interval: %s seconds", interval)
+        logger.info("Max retries per run: %s", max_retries_per_run)
 
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully."""
-        print(f"\n[{self._timestamp()}] Received signal {signum}, shutting down...")
+        logger.info("Received signal %s, shutting down...", signum)
         self.running = False
-
-    def _timestamp(self) -> str:
-        """Get formatted timestamp for logging."""
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._stop.set()
 
     def _log_stats(self):
         """Log current statistics."""
         uptime = datetime.now() - self.start_time
-        print(f"\n[{self._timestamp()}] === Worker Statistics ===")
-        print(f"[{self._timestamp()}] Uptime: {uptime}")
-        print(f"[{self._timestamp()}] Total retry attempts: {self.total_retries}")
-        print(f"[{self._timestamp()}] Total successes: {self.total_successes}")
-        print(f"[{self._timestamp()}] Total failures: {self.total_failures}")
+        logger.info("=== Worker Statistics ===")
+        logger.info("Uptime: %s", uptime)
+        logger.info("Total retry attempts: %s", self.total_retries)
+        logger.info("Total successes: %s", self.total_successes)
+        logger.info("Total failures: %s", self.total_failures)
+
+        # Full table statistics are only gathered here, not on every cycle
+        try:
+            with self.app.app_context():
+                stats = get_transaction_stats()
+            logger.info(
+                "Transactions: %s total, %s sent, %s unsent",
+                stats['total'], stats['sent'], stats['unsent']
+            )
+        except Exception as e:
+            logger.error("Could not load transaction statistics: %s", e)
 
     def run_retry_cycle(self):
         """Run a single retry cycle."""
         with self.app.app_context():
             try:
-                # Get statistics before retry
-                stats_before = get_transaction_stats()
-                unsent_count = stats_before['unsent']
-
-                if unsent_count == 0:
-                    print(f"[{self._timestamp()}] No unsent transactions, skipping cycle")
+                # Cheap existence check so idle cycles cost a single query
+                if not has_unsent_transactions():
+                    logger.info("No unsent transactions, skipping cycle")
                     return
 
-                print(f"\n[{self._timestamp()}] Starting retry cycle...")
-                print(f"[{self._timestamp()}] Found {unsent_count} unsent transactions")
+                logger.info("Starting retry cycle...")
 
                 # Retry transactions
                 results = retry_unsent_transactions(limit=self.max_retries_per_run)
@@ -96,30 +109,26 @@ class RetryWorker:
                 self.total_failures += results['failed']
 
                 # Log results
-                print(f"[{self._timestamp()}] Retry cycle completed")
-                print(f"[{self._timestamp()}] Processed: {results['total']}")
-                print(f"[{self._timestamp()}] Succeeded: {results['succeeded']}")
-                print(f"[{self._timestamp()}] Failed: {results['failed']}")
+                logger.info("Retry cycle completed")
+                logger.info("Processed: %s", results['total'])
+                logger.info("Succeeded: %s", results['succeeded'])
+                logger.info("Failed: %s", results['failed'])
 
                 # Log any failures
                 if results['failed'] > 0:
-                    print(f"[{self._timestamp()}] Failed transactions:")
-                    for result in results['results']:
-                        if not result['success']:
-                            print(
-                                f"[{self._timestamp()}]   - ID {result['db_id']} "
-                                f"({result['reference']}): {result['error']}"
-                            )
+                    logger.info("Failed transactions:")
+                    for result in results['failed_details']:
+                        logger.info(
+                            "  - ID %s (%s): %s", result['db_id'], result['reference'], result['error']
+                        )
 
             except Exception as e:
-                print(f"[{self._timestamp()}] ERROR in retry cycle: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("ERROR in retry cycle: %s", e)
 
     def run(self):
         """Main worker loop."""
-        print(f"[{self._timestamp()}] Worker started, waiting for first cycle...")
-        print(f"[{self._timestamp()}] Press Ctrl+C to stop\n")
+        logger.info("Worker started, waiting for first cycle...")
+        logger.info("Press Ctrl+C to stop")
 
         cycle_count = 0
 
@@ -135,26 +144,21 @@ class RetryWorker:
 
                 # Wait for next cycle (interruptible sleep)
                 if self.running:
-                    print(f"[{self._timestamp()}] Next cycle in {self.interval} seconds...")
-                    for _ in range(self.interval):
-                        if not self.running:
-                            break
-                        time.sleep(1)
+                    logger.info("Next cycle in %s seconds...", self.interval)
+                    self._stop.wait(self.interval)
 
             except KeyboardInterrupt:
-                print(f"\n[{self._timestamp()}] Keyboard interrupt received")
+                logger.info("Keyboard interrupt received")
                 break
             except Exception as e:
-                print(f"[{self._timestamp()}] ERROR in main loop: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("ERROR in main loop: %s", e)
                 # Wait a bit before retrying to avoid rapid error loops
-                time.sleep(10)
+                self._stop.wait(10)
 
         # Final statistics
-        print(f"\n[{self._timestamp()}] Worker shutting down...")
+        logger.info("Worker shutting down...")
         self._log_stats()
-        print(f"[{self._timestamp()}] Goodbye!")
+        logger.info("Goodbye!")
 
 
 def main():
@@ -177,6 +181,14 @@ def main():
 
     args = parser.parse_args()
 
+    # Timestamps come from the formatter, only for records that are emitted
+    logging.basicConfig(
+        stream=sys.stdout,
+        level=logging.INFO,
+        format="[%(asctime)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
     # Validate arguments
     if args.interval < 10:
         print("ERROR: Interval must be at least 10 seconds")
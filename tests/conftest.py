@@ -2,63 +2,94 @@
 Pytest configuration and fixtures
 """
 import os
+from types import MappingProxyType
+from datetime import datetime, UTC, timedelta
+
+import jwt
 import pytest
 
 # Set test database URI BEFORE any app imports
 # This must be done at module level before create_app is called
 os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
 
+from sqlalchemy import event
+
 from app import create_app
 from app.database import db as _db
 
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
+@event.listens_for(_db.session, "after_begin")
+def _set_schema_translate_map(session, transaction, connection):
+    """Translate schema names for SQLite (removes schema prefix)"""
+    # SQLite doesn't support schemas, so we use schema_translate_map
+    # to effectively remove the schema from table names
+    if connection.engine.dialect.name == 'sqlite':
+        connection.execution_options(
+            schema_translate_map={"dapp": None}
+        )
+
+
+def _create_test_app():
+    """Create a test application and its tables."""
     app = create_app('development')
     app.config['TESTING'] = True
     app.config['SECRET_KEY'] = 'test-secret-key-for-jwt'
     app.config['WTF_CSRF_ENABLED'] = False
 
-    # Explicitly set SQLite for tests (already set in env but making it clear)
-    # Note: SQLite doesn't support PostgreSQL schemas, but SQLAlchemy will
-    # automatically ignore the schema parameter when using SQLite
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # The engine comes from DATABASE_URL above. Flask-SQLAlchemy gives an
+    # in-memory SQLite URL a StaticPool, so every session and test client
+    # request shares the one connection (and therefore the one database).
 
     with app.app_context():
-        # For SQLite, we need to tell SQLAlchemy to ignore schema names
-        # SQLite doesn't support schemas, so we use schema_translate_map
-        # to effectively remove the schema from table names
-        from sqlalchemy import event
-
-        @event.listens_for(_db.engine, "connect")
-        def _set_sqlite_pragma(dbapi_connection, connection_record):
-            """Set up schema translation for all SQLite connections"""
-            # This is called for every new connection
-
-        @event.listens_for(_db.session, "after_begin")
-        def _set_schema_translate_map(session, transaction, connection):
-            """Translate schema names for SQLite (removes schema prefix)"""
-            if connection.engine.dialect.name == 'sqlite':
-                connection.execution_options(
-                    schema_translate_map={"dapp": None}
-                )
-
         # Create all tables in the test database with schema translation
         connection = _db.engine.connect()
         connection = connection.execution_options(schema_translate_map={"dapp": None})
         _db.metadata.create_all(bind=connection)
         connection.close()
 
+    return app
+
+
+@pytest.fixture(scope="session")
+def _session_app():
+    """Create the application once for the whole test session."""
+    return _create_test_app()
+
+
+@pytest.fixture
+def app(request, _session_app):
+    """
+    Provide the session's application with empty tables for each test.
+
+    The tables are created once per session and emptied after every test.
+    Config and extension entries that a test changes are restored and rate
+    limits are reset afterwards, so tests stay independent of each other.
+    Tests marked ``fresh_app`` (e.g. ones registering their own blueprints,
+    which Flask refuses once an app has served a request) get a new app.
+    """
+    if request.node.get_closest_marker('fresh_app'):
+        app = _create_test_app()
+    else:
+        app = _session_app
+    config = dict(app.config)
+    extensions = dict(app.extensions)
+    for limiter in app.extensions.get('limiter', ()):
+        limiter.reset()
+
+    with app.app_context():
         yield app
 
-        # Cleanup
+        # Cleanup: delete the rows, children first, and keep the schema
         _db.session.remove()
-        connection = _db.engine.connect()
-        connection = connection.execution_options(schema_translate_map={"dapp": None})
-        _db.metadata.drop_all(bind=connection)
-        connection.close()
+        with _db.engine.begin() as connection:
+            connection = connection.execution_options(schema_translate_map={"dapp": None})
+            for table in reversed(_db.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+    app.config.clear()
+    app.config.update(config)
+    app.extensions.clear()
+    app.extensions.update(extensions)
 
 
 @pytest.fixture
@@ -73,39 +104,60 @@ def runner(app):
     return app.test_cli_runner()
 
 
-@pytest.fixture
-def auth_headers(app):
-    """Generate valid auth headers with JWT token."""
-    import jwt
-    from datetime import datetime, UTC, timedelta
-
+def _bearer_headers(secret_key: str, issued_at: datetime, lifetime: timedelta) -> MappingProxyType:
+    """Build read-only Authorization headers carrying an HS256 JWT."""
     token = jwt.encode(
         {
             'wallet_address': 'test_wallet_address',
-            'exp': datetime.now(UTC) + timedelta(hours=1),
-            'iat': datetime.now(UTC)
+            'exp': issued_at + lifetime,
+            'iat': issued_at
         },
-        app.config['SECRET_KEY'],
+        secret_key,
         algorithm='HS256'
     )
 
-    return {'Authorization': f'Bearer {token}'}
+    return MappingProxyType({'Authorization': f'Bearer {token}'})
 
 
-@pytest.fixture
-def expired_auth_headers(app):
-    """Generate expired auth headers with JWT token."""
-    import jwt
-    from datetime import datetime, UTC, timedelta
+@pytest.fixture(scope="session")
+def auth_headers(_session_app):
+    """Generate valid auth headers with JWT token, once per session."""
+    return _bearer_headers(_session_app.config['SECRET_KEY'], datetime.now(UTC), timedelta(hours=1))
 
-    token = jwt.encode(
-        {
-            'wallet_address': 'test_wallet_address',
-            'exp': datetime.now(UTC) - timedelta(hours=1),
-            'iat': datetime.now(UTC) - timedelta(hours=2)
-        },
-        app.config['SECRET_KEY'],
-        algorithm='HS256'
+
+@pytest.fixture(scope="session")
+def expired_auth_headers(_session_app):
+    """Generate expired auth headers with JWT token, once per session."""
+    return _bearer_headers(
+        _session_app.config['SECRET_KEY'], datetime.now(UTC) - timedelta(hours=2), timedelta(hours=1)
     )
 
-    return {'Authorization': f'Bearer {token}'}
+
+class BatchingBus:
+    """Message bus double exposing a native batch send"""
+
+    def __init__(self, failed_ids=()):
+        self.batches = []
+        self.failed_ids = failed_ids
+
+    def send_message(self, message, queue_name, source):
+        raise AssertionError("send_message should not be used when batching is available")
+
+    def send_message_batch(self, messages, queue_name, source):
+        self.batches.append(list(messages))
+        return {
+            "Successful": [
+                {"Id": str(i), "MessageId": f"msg-{i}"}
+                for i in range(len(messages)) if i not in self.failed_ids
+            ],
+            "Failed": [
+                {"Id": str(i), "Code": "InternalError", "Message": "try again"}
+                for i in range(len(messages)) if i in self.failed_ids
+            ],
+        }
+
+
+@pytest.fixture
+def batching_bus():
+    """Provide the batching message bus double; call it with the entry indices to fail."""
+    return BatchingBus
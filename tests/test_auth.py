@@ -1,12 +1,14 @@
 """
 Tests for authentication module (app/mod_common/auth.py)
 """
-import time
+import json
 import jwt
 import base64
+import base58
 from datetime import datetime, UTC, timedelta
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 import pytest
+from sqlalchemy import insert, select
 from nacl.signing import SigningKey
 from nacl.encoding import Base64Encoder
 
@@ -19,6 +21,48 @@ from app.mod_common.auth import (
 from app.models import Nonce
 from app.database import db
 
+# Request bodies used across the endpoint tests, serialized once
+_JSON = 'application/json'
+_CHALLENGE_BODY = json.dumps({'wallet_address': 'test_wallet_123'}).encode()
+_VERIFY_BODY = json.dumps({
+    'wallet_address': 'test_wallet',
+    'signature': 'valid_signature',
+    'nonce': 'valid_nonce'
+}).encode()
+_INVALID_VERIFY_BODY = json.dumps({
+    'wallet_address': 'test_wallet',
+    'signature': 'fake_signature',
+    'nonce': 'invalid_nonce'
+}).encode()
+
+
+def _stored_nonces(*nonces):
+    """Return which of the given nonce values exist, with one SELECT"""
+    return set(db.session.scalars(select(Nonce.nonce).where(Nonce.nonce.in_(nonces))))
+
+
+def _sign(signing_key, message):
+    """Sign a message and return the base64 signature the wallet would send"""
+    return base64.b64encode(signing_key.sign(message.encode('utf-8')).signature).decode('utf-8')
+
+
+@pytest.fixture
+def now():
+    """Current UTC time, taken once per test"""
+    return datetime.now(UTC)
+
+
+@pytest.fixture(scope="session")
+def signing_key():
+    """Ed25519 key standing in for a Solana wallet, shared by the whole session"""
+    return SigningKey.generate()
+
+
+@pytest.fixture(scope="session")
+def wallet_address(signing_key):
+    """Base58 (Solana) wallet address of the shared signing key"""
+    return base58.b58encode(signing_key.verify_key.encode()).decode('utf-8')
+
 
 class TestGenerateAuthChallenge:
     """Tests for generate_auth_challenge function"""
@@ -28,8 +72,9 @@ class TestGenerateAuthChallenge:
         with app.app_context():
             wallet_address = "test_wallet_123"
 
+            # Nonces come from secrets.token_urlsafe, so back-to-back calls
+            # must already differ without waiting for the clock to move
             challenge1 = generate_auth_challenge(wallet_address)
-            time.sleep(0.01)  # Small delay to ensure different timestamps
             challenge2 = generate_auth_challenge(wallet_address)
 
             assert challenge1['nonce'] != challenge2['nonce']
@@ -191,19 +236,16 @@ class TestVerifyWalletSignature:
             assert is_valid is False
             assert "verification failed" in error.lower()
 
-    def test_signature_verification_failure(self, app):
+    def test_signature_verification_failure(self, app, signing_key):
         """Test verification fails for incorrect signature"""
         with app.app_context():
-            # Create a signing key
-            signing_key = SigningKey.generate()
             wallet_address = base64.b64encode(signing_key.verify_key.encode()).decode('utf-8')
 
             challenge = generate_auth_challenge(wallet_address)
 
             # Sign wrong message
             wrong_message = "wrong message"
-            signed = signing_key.sign(wrong_message.encode('utf-8'))
-            signature_b64 = base64.b64encode(signed.signature).decode('utf-8')
+            signature_b64 = _sign(signing_key, wrong_message)
 
             is_valid, error = verify_wallet_signature(
                 wallet_address,
@@ -214,22 +256,15 @@ class TestVerifyWalletSignature:
             assert is_valid is False
             assert "verification failed" in error.lower()
 
-    def test_successful_signature_verification(self, app):
+    def test_successful_signature_verification(self, app, signing_key, wallet_address):
         """Test successful signature verification flow"""
         with app.app_context():
-            # Create a signing key (simulating Solana wallet)
-            signing_key = SigningKey.generate()
-            # Use base58 encoding for Solana wallet address
-            import base58
-            wallet_address = base58.b58encode(signing_key.verify_key.encode()).decode('utf-8')
-
             # Generate challenge
             challenge = generate_auth_challenge(wallet_address)
 
             # Sign the message
             message = challenge['message']
-            signed = signing_key.sign(message.encode('utf-8'))
-            signature_b64 = base64.b64encode(signed.signature).decode('utf-8')
+            signature_b64 = _sign(signing_key, message)
 
             # Verify
             is_valid, error = verify_wallet_signature(
@@ -244,22 +279,15 @@ class TestVerifyWalletSignature:
             nonce_record = Nonce.query.filter_by(nonce=challenge['nonce']).first()
             assert nonce_record.used is True
 
-    def test_nonce_cannot_be_reused(self, app):
+    def test_nonce_cannot_be_reused(self, app, signing_key, wallet_address):
         """Test that a nonce cannot be used twice"""
         with app.app_context():
-            # Create a signing key
-            signing_key = SigningKey.generate()
-            # Use base58 encoding for Solana wallet address
-            import base58
-            wallet_address = base58.b58encode(signing_key.verify_key.encode()).decode('utf-8')
-
             # Generate challenge
             challenge = generate_auth_challenge(wallet_address)
 
             # Sign the message
             message = challenge['message']
-            signed = signing_key.sign(message.encode('utf-8'))
-            signature_b64 = base64.b64encode(signed.signature).decode('utf-8')
+            signature_b64 = _sign(signing_key, message)
 
             # First verification - should succeed
             is_valid, error = verify_wallet_signature(
@@ -282,65 +310,58 @@ class TestVerifyWalletSignature:
 class TestCleanupExpiredNonces:
     """Tests for cleanup_expired_nonces function"""
 
-    def test_removes_expired_nonces(self, app):
+    def test_removes_expired_nonces(self, app, now):
         """Test that expired nonces are removed"""
         with app.app_context():
             # Add some nonces to database
-            current_time = datetime.now(UTC)
-
-            expired1 = Nonce(
-                nonce='expired1',
-                wallet_address='wallet1',
-                expires_at=current_time - timedelta(seconds=100),
-                used=False
-            )
-            expired2 = Nonce(
-                nonce='expired2',
-                wallet_address='wallet2',
-                expires_at=current_time - timedelta(seconds=50),
-                used=False
-            )
-            valid = Nonce(
-                nonce='valid',
-                wallet_address='wallet3',
-                expires_at=current_time + timedelta(seconds=100),
-                used=False
-            )
-
-            db.session.add_all([expired1, expired2, valid])
+            db.session.execute(insert(Nonce), [
+                {
+                    'nonce': 'expired1',
+                    'wallet_address': 'wallet1',
+                    'expires_at': now - timedelta(seconds=100),
+                    'used': False
+                },
+                {
+                    'nonce': 'expired2',
+                    'wallet_address': 'wallet2',
+                    'expires_at': now - timedelta(seconds=50),
+                    'used': False
+                },
+                {
+                    'nonce': 'valid',
+                    'wallet_address': 'wallet3',
+                    'expires_at': now + timedelta(seconds=100),
+                    'used': False
+                },
+            ])
             db.session.commit()
 
             cleanup_expired_nonces()
 
-            assert Nonce.query.filter_by(nonce='expired1').first() is None
-            assert Nonce.query.filter_by(nonce='expired2').first() is None
-            assert Nonce.query.filter_by(nonce='valid').first() is not None
+            assert _stored_nonces('expired1', 'expired2', 'valid') == {'valid'}
 
-    def test_keeps_valid_nonces(self, app):
+    def test_keeps_valid_nonces(self, app, now):
         """Test that non-expired nonces are kept"""
         with app.app_context():
-            current_time = datetime.now(UTC)
-
-            valid1 = Nonce(
-                nonce='valid1',
-                wallet_address='wallet1',
-                expires_at=current_time + timedelta(seconds=100),
-                used=False
-            )
-            valid2 = Nonce(
-                nonce='valid2',
-                wallet_address='wallet2',
-                expires_at=current_time + timedelta(seconds=200),
-                used=True  # Even if used
-            )
-
-            db.session.add_all([valid1, valid2])
+            db.session.execute(insert(Nonce), [
+                {
+                    'nonce': 'valid1',
+                    'wallet_address': 'wallet1',
+                    'expires_at': now + timedelta(seconds=100),
+                    'used': False
+                },
+                {
+                    'nonce': 'valid2',
+                    'wallet_address': 'wallet2',
+                    'expires_at': now + timedelta(seconds=200),
+                    'used': True  # Even if used
+                },
+            ])
             db.session.commit()
 
             cleanup_expired_nonces()
 
-            assert Nonce.query.filter_by(nonce='valid1').first() is not None
-            assert Nonce.query.filter_by(nonce='valid2').first() is not None
+            assert _stored_nonces('valid1', 'valid2') == {'valid1', 'valid2'}
 
     def test_empty_store(self, app):
         """Test cleanup on empty database doesn't error"""
@@ -348,31 +369,27 @@ class TestCleanupExpiredNonces:
             cleanup_expired_nonces()  # Should not raise
             assert Nonce.query.count() == 0
 
-    def test_cleanup_returns_count(self, app):
+    def test_cleanup_returns_count(self, app, now):
         """Test that cleanup returns number of removed nonces"""
         with app.app_context():
-            current_time = datetime.now(UTC)
-
-            # Add 3 expired nonces
-            for i in range(3):
-                nonce = Nonce(
-                    nonce=f'expired_{i}',
-                    wallet_address=f'wallet_{i}',
-                    expires_at=current_time - timedelta(seconds=100),
-                    used=False
-                )
-                db.session.add(nonce)
-
-            # Add 2 valid nonces
-            for i in range(2):
-                nonce = Nonce(
-                    nonce=f'valid_{i}',
-                    wallet_address=f'wallet_{i}',
-                    expires_at=current_time + timedelta(seconds=100),
-                    used=False
-                )
-                db.session.add(nonce)
-
+            # Add 3 expired nonces and 2 valid nonces in one INSERT
+            db.session.execute(insert(Nonce), [
+                {
+                    'nonce': f'expired_{i}',
+                    'wallet_address': f'wallet_{i}',
+                    'expires_at': now - timedelta(seconds=100),
+                    'used': False
+                }
+                for i in range(3)
+            ] + [
+                {
+                    'nonce': f'valid_{i}',
+                    'wallet_address': f'wallet_{i}',
+                    'expires_at': now + timedelta(seconds=100),
+                    'used': False
+                }
+                for i in range(2)
+            ])
             db.session.commit()
 
             removed_count = cleanup_expired_nonces()
@@ -384,11 +401,19 @@ class TestCleanupExpiredNonces:
 class TestAuthEndpoints:
     """Tests for authentication API endpoints"""
 
+    @pytest.fixture
+    def mock_verify(self, monkeypatch):
+        """Replace signature verification with a mock that accepts by default"""
+        mock = MagicMock(return_value=(True, None))
+        monkeypatch.setattr('app.mod_common.auth.verify_wallet_signature', mock)
+        return mock
+
     def test_get_challenge_success(self, client):
         """Test successful challenge generation"""
         response = client.post(
             '/auth/auth/challenge',
-            json={'wallet_address': 'test_wallet_123'}
+            data=_CHALLENGE_BODY,
+            content_type=_JSON
         )
 
         assert response.status_code == 200
@@ -417,71 +442,51 @@ class TestAuthEndpoints:
 
     def test_get_challenge_rate_limiting(self, client):
         """Test rate limiting on challenge endpoint"""
-        wallet_address = 'test_wallet_123'
-
         # Make 5 requests (should all succeed)
         for i in range(5):
             response = client.post(
                 '/auth/auth/challenge',
-                json={'wallet_address': wallet_address}
+                data=_CHALLENGE_BODY,
+                content_type=_JSON
             )
             assert response.status_code == 200
 
         # 6th request should be rate limited
         response = client.post(
             '/auth/auth/challenge',
-            json={'wallet_address': wallet_address}
+            data=_CHALLENGE_BODY,
+            content_type=_JSON
         )
         assert response.status_code == 429  # Too Many Requests
 
-    def test_verify_signature_missing_fields(self, client):
+    @pytest.mark.parametrize("payload", [
+        {},  # Missing all fields
+        {'wallet_address': 'addr', 'nonce': 'nonce'},  # Missing signature
+        {'wallet_address': 'addr', 'signature': 'sig'},  # Missing nonce
+    ], ids=["all", "signature", "nonce"])
+    def test_verify_signature_missing_fields(self, client, payload):
         """Test verify endpoint with missing fields"""
-        # Missing all fields
-        response = client.post('/auth/auth/verify', json={})
-        assert response.status_code == 400
-
-        # Missing signature
-        response = client.post(
-            '/auth/auth/verify',
-            json={'wallet_address': 'addr', 'nonce': 'nonce'}
-        )
-        assert response.status_code == 400
-
-        # Missing nonce
-        response = client.post(
-            '/auth/auth/verify',
-            json={'wallet_address': 'addr', 'signature': 'sig'}
-        )
+        response = client.post('/auth/auth/verify', json=payload)
         assert response.status_code == 400
 
     def test_verify_signature_invalid_nonce(self, client):
         """Test verify endpoint with invalid nonce"""
         response = client.post(
             '/auth/auth/verify',
-            json={
-                'wallet_address': 'test_wallet',
-                'signature': 'fake_signature',
-                'nonce': 'invalid_nonce'
-            }
+            data=_INVALID_VERIFY_BODY,
+            content_type=_JSON
         )
 
         assert response.status_code == 401
         data = response.get_json()
         assert 'error' in data
 
-    @patch('app.mod_common.auth.verify_wallet_signature')
     def test_verify_signature_success(self, mock_verify, client, app):
         """Test successful signature verification"""
-        # Mock successful verification
-        mock_verify.return_value = (True, None)
-
         response = client.post(
             '/auth/auth/verify',
-            json={
-                'wallet_address': 'test_wallet',
-                'signature': 'valid_signature',
-                'nonce': 'valid_nonce'
-            }
+            data=_VERIFY_BODY,
+            content_type=_JSON
         )
 
         assert response.status_code == 200
@@ -502,22 +507,16 @@ class TestAuthEndpoints:
         )
         assert payload['wallet_address'] == 'test_wallet'
 
-    @patch('app.mod_common.auth.verify_wallet_signature')
     def test_verify_signature_creates_session(self, mock_verify, client):
         """Test that successful verification creates session"""
-        mock_verify.return_value = (True, None)
-
         with client.session_transaction() as sess:
             assert 'wallet_address' not in sess
             assert 'authenticated' not in sess
 
         response = client.post(
             '/auth/auth/verify',
-            json={
-                'wallet_address': 'test_wallet',
-                'signature': 'valid_signature',
-                'nonce': 'valid_nonce'
-            }
+            data=_VERIFY_BODY,
+            content_type=_JSON
         )
 
         assert response.status_code == 200
@@ -532,33 +531,33 @@ class TestAuthEndpoints:
         with app.app_context():
             current_time = datetime.now(UTC)
 
-            # Add various nonces to database
-            expired_used = Nonce(
-                nonce='expired_used',
-                wallet_address='wallet1',
-                expires_at=current_time - timedelta(seconds=100),
-                used=True
-            )
-            expired_unused = Nonce(
-                nonce='expired_unused',
-                wallet_address='wallet2',
-                expires_at=current_time - timedelta(seconds=50),
-                used=False
-            )
-            valid_used = Nonce(
-                nonce='valid_used',
-                wallet_address='wallet3',
-                expires_at=current_time + timedelta(seconds=100),
-                used=True
-            )
-            valid_unused = Nonce(
-                nonce='valid_unused',
-                wallet_address='wallet4',
-                expires_at=current_time + timedelta(seconds=200),
-                used=False
-            )
-
-            db.session.add_all([expired_used, expired_unused, valid_used, valid_unused])
+            # Add various nonces to database in one INSERT
+            db.session.execute(insert(Nonce), [
+                {
+                    'nonce': 'expired_used',
+                    'wallet_address': 'wallet1',
+                    'expires_at': current_time - timedelta(seconds=100),
+                    'used': True
+                },
+                {
+                    'nonce': 'expired_unused',
+                    'wallet_address': 'wallet2',
+                    'expires_at': current_time - timedelta(seconds=50),
+                    'used': False
+                },
+                {
+                    'nonce': 'valid_used',
+                    'wallet_address': 'wallet3',
+                    'expires_at': current_time + timedelta(seconds=100),
+                    'used': True
+                },
+                {
+                    'nonce': 'valid_unused',
+                    'wallet_address': 'wallet4',
+                    'expires_at': current_time + timedelta(seconds=200),
+                    'used': False
+                },
+            ])
             db.session.commit()
 
             response = client.get('/auth/auth/stats')
@@ -605,13 +604,10 @@ class TestAuthEndpoints:
 
             assert response.status_code == 200
 
-            # Expired nonce should be gone
-            assert Nonce.query.filter_by(nonce='expired1').first() is None
-
-            # But new challenge nonce should be present
+            # Expired nonce should be gone, but new challenge nonce should be present
             data = response.get_json()
             new_nonce = data['challenge']['nonce']
-            assert Nonce.query.filter_by(nonce=new_nonce).first() is not None
+            assert _stored_nonces('expired1', new_nonce) == {new_nonce}
 
     def test_verify_endpoint_triggers_cleanup(self, app, client):
         """Test that verify endpoint automatically cleans up expired nonces"""
@@ -631,28 +627,35 @@ class TestAuthEndpoints:
             # Make verify request (should trigger cleanup)
             response = client.post(
                 '/auth/auth/verify',
-                json={
-                    'wallet_address': 'test_wallet',
-                    'signature': 'fake_signature',
-                    'nonce': 'invalid_nonce'
-                }
+                data=_INVALID_VERIFY_BODY,
+                content_type=_JSON
             )
 
             # Expired nonce should be gone (even though verify failed)
-            assert Nonce.query.filter_by(nonce='expired1').first() is None
+            assert _stored_nonces('expired1') == set()
+
+    def test_endpoint_cleanup_runs_once_per_interval(self, app, client, now):
+        """Test that requests inside the cleanup interval skip the cleanup"""
+        client.post('/auth/auth/challenge', json={'wallet_address': 'first_wallet'})
+
+        db.session.execute(insert(Nonce), [
+            {'nonce': 'expired1', 'wallet_address': 'wallet1',
+             'expires_at': now - timedelta(seconds=100), 'used': False},
+        ])
+        db.session.commit()
+
+        response = client.post('/auth/auth/challenge', json={'wallet_address': 'second_wallet'})
+
+        assert response.status_code == 200
+        # The first request already cleaned up, so the expired nonce stays
+        assert _stored_nonces('expired1') == {'expired1'}
 
 
 class TestAuthIntegration:
     """Integration tests for full authentication flow"""
 
-    def test_full_authentication_flow(self, client, app):
+    def test_full_authentication_flow(self, client, app, signing_key, wallet_address):
         """Test complete flow from challenge to verification"""
-        # Generate signing key
-        signing_key = SigningKey.generate()
-        # Use base58 encoding for Solana wallet address
-        import base58
-        wallet_address = base58.b58encode(signing_key.verify_key.encode()).decode('utf-8')
-
         # Step 1: Request challenge
         response = client.post(
             '/auth/auth/challenge',
@@ -664,8 +667,7 @@ class TestAuthIntegration:
 
         # Step 2: Sign the message
         message = challenge['message']
-        signed = signing_key.sign(message.encode('utf-8'))
-        signature_b64 = base64.b64encode(signed.signature).decode('utf-8')
+        signature_b64 = _sign(signing_key, message)
 
         # Step 3: Verify signature
         response = client.post(
@@ -8,6 +8,9 @@ from flask import Blueprint, jsonify
 
 from app.decorators import require_wallet_auth
 
+# These tests register their own blueprints, which needs an unused app
+pytestmark = pytest.mark.fresh_app
+
 
 class TestRequireWalletAuthDecorator:
     """Tests for @require_wallet_auth decorator"""
@@ -268,6 +271,29 @@ class TestRequireWalletAuthDecorator:
 
         assert response.status_code == 200
 
+    def test_cached_token_rejected_after_expiry(self, client, test_blueprint, app, monkeypatch):
+        """Test that a token accepted earlier is rejected once it expires"""
+        expires_at = datetime.now(UTC) + timedelta(minutes=5)
+        token = jwt.encode(
+            {
+                'wallet_address': 'test_wallet_123',
+                'exp': expires_at,
+                'iat': datetime.now(UTC)
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256'
+        )
+        headers = {'Authorization': f'Bearer {token}'}
+
+        response = client.get('/protected', headers=headers)
+        assert response.status_code == 200
+
+        # Move the decorator's clock past expiry; the payload is now cached
+        monkeypatch.setattr('app.decorators.time.time', lambda: expires_at.timestamp() + 1)
+
+        response = client.get('/protected', headers=headers)
+        assert response.status_code == 302
+
     def test_malformed_authorization_header(self, client, test_blueprint):
         """Test various malformed Authorization headers"""
         malformed_headers = [
@@ -147,7 +147,7 @@ class TestInboxIntegration:
                 mock_solana.assert_called_once()
                 call_args = mock_solana.call_args[1]
                 assert call_args['recipient_address'] == "SolanaWallet123"
-                assert call_args['amount'] == float(Decimal("97.50"))  # 100 - 2.5
+                assert call_args['amount_in_smallest_unit'] == 97_500_000  # 100 - 2.5
                 assert call_args['currency'] == "EURC"
 
             # Step 5: Verify final state
@@ -560,4 +560,4 @@ class TestInboxIntegration:
 
                 # Verify Solana called with net amount (value - fee)
                 call_args = mock_solana.call_args[1]
-                assert call_args['amount'] == float(expected_net)
+                assert call_args['amount_in_smallest_unit'] == int(expected_net * 10 ** 6)
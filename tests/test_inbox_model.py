@@ -2,7 +2,7 @@
 Tests for the Inbox model and inbox pattern functionality
 """
 import uuid
-from datetime import datetime, UTC
+from datetime import datetime, timedelta, UTC
 import pytest
 from app.models import Inbox
 from app.database import db
@@ -322,3 +322,68 @@ class TestInboxModel:
             inbox_message.mark_failed("Error 3")
             db.session.commit()
             assert inbox_message.retry_count == initial_count + 3
+
+    def test_claim_batch(self, app):
+        """Test claiming the oldest pending messages marks them as processing"""
+        with app.app_context():
+            base = datetime.now(UTC) - timedelta(minutes=10)
+            for i, status in enumerate(["pending", "completed", "pending", "pending"]):
+                db.session.add(Inbox(
+                    message_id=f"msg-claim-{i}",
+                    message_body={"test": "data"},
+                    transaction_reference=f"TEST_REF_{i}",
+                    status=status,
+                    created_at=base + timedelta(minutes=i)
+                ))
+            db.session.commit()
+
+            claimed = Inbox.claim_batch(2)
+            db.session.commit()
+
+            assert [msg.message_id for msg in claimed] == ["msg-claim-0", "msg-claim-2"]
+            assert all(msg.status == "processing" for msg in claimed)
+            assert all(msg.processing_started_at is not None for msg in claimed)
+            assert Inbox.query.filter_by(status="pending").count() == 1
+
+    def test_purge_processed(self, app):
+        """Test that only old completed and failed messages are purged"""
+        with app.app_context():
+            old = datetime.now(UTC) - timedelta(days=60)
+            for status, updated_at in [
+                ("completed", old),
+                ("failed", old),
+                ("pending", old),
+                ("completed", datetime.now(UTC)),
+            ]:
+                db.session.add(Inbox(
+                    message_id=f"msg-{uuid.uuid4()}",
+                    message_body={"test": "data"},
+                    transaction_reference="TEST_REF",
+                    status=status,
+                    updated_at=updated_at
+                ))
+            db.session.commit()
+
+            deleted = Inbox.purge_processed(datetime.now(UTC) - timedelta(days=30))
+
+            assert deleted == 2
+            remaining = sorted(msg.status for msg in Inbox.query.all())
+            assert remaining == ["completed", "pending"]
+
+    def test_insert_if_new(self, app):
+        """Test that a redelivered message_id is dropped by the insert"""
+        with app.app_context():
+            message_id = f"msg-{uuid.uuid4()}"
+            body = {"reference": "MYK7777777777", "status": "APPROVED"}
+
+            inbox_id = Inbox.insert_if_new(message_id, body, "receipt-1")
+            duplicate_id = Inbox.insert_if_new(message_id, body, "receipt-2")
+            db.session.commit()
+
+            assert inbox_id is not None
+            assert duplicate_id is None
+            stored = Inbox.query.filter_by(message_id=message_id).one()
+            assert stored.id == inbox_id
+            assert stored.status == "pending"
+            assert stored.transaction_reference == "MYK7777777777"
+            assert stored.receipt_handle == "receipt-1"
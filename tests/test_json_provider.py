@@ -0,0 +1,44 @@
+"""
+Tests for the orjson JSON provider (app/json_provider.py)
+"""
+from datetime import datetime, UTC
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import OrjsonProvider
+
+
+PAYLOAD = {
+    'wallet_address': 'wallet',
+    'amount': Decimal('10.50'),
+    'created_at': datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC),
+    'a_first': [1, 2.5, None, True],
+}
+
+
+class TestOrjsonProvider:
+    """Tests for OrjsonProvider"""
+
+    def test_dumps_matches_flask_default(self, app):
+        """Test that dumps produces the same document as Flask's provider"""
+        default = DefaultJSONProvider(app)
+        provider = OrjsonProvider(app)
+
+        assert provider.loads(provider.dumps(PAYLOAD)) == default.loads(default.dumps(PAYLOAD))
+        assert provider.dumps(PAYLOAD).startswith('{"a_first"')
+
+    def test_datetimes_use_http_date_format(self, app):
+        """Test that datetimes keep Flask's HTTP date format"""
+        data = OrjsonProvider(app).loads(OrjsonProvider(app).dumps(PAYLOAD))
+
+        assert data['created_at'] == 'Thu, 02 Jan 2025 03:04:05 GMT'
+        assert data['amount'] == '10.50'
+
+    def test_response_is_json(self, app):
+        """Test that responses carry the JSON mimetype and body"""
+        response = OrjsonProvider(app).response(PAYLOAD)
+
+        assert response.mimetype == 'application/json'
+        assert response.get_json()['wallet_address'] == 'wallet'
+        assert response.get_data().endswith(b'\n')
@@ -0,0 +1,116 @@
+"""
+Tests for the message bus helpers
+"""
+from unittest.mock import Mock
+from app.message_bus import publish_messages, send_message_batch
+
+
+class TestSendMessageBatch:
+    """Tests for send_message_batch"""
+
+    def test_falls_back_to_single_sends(self):
+        """Test that a bus without batch support gets one send per message"""
+        bus = Mock()
+        bus.send_message = Mock(side_effect=[{"MessageId": "1"}, Exception("boom"), {"MessageId": "3"}])
+
+        failed = send_message_batch(bus, ["a", "b", "c"], "queue", "source")
+
+        assert bus.send_message.call_count == 3
+        assert [message for message, _ in failed] == ["b"]
+
+    def test_uses_native_batches_of_ten(self, batching_bus):
+        """Test that messages are chunked into batches of at most 10"""
+        bus = batching_bus()
+
+        failed = send_message_batch(bus, list(range(23)), "queue", "source")
+
+        assert failed == []
+        assert [len(batch) for batch in bus.batches] == [10, 10, 3]
+
+    def test_reports_failed_entries(self, batching_bus):
+        """Test that failed batch entries are returned with their message"""
+        bus = batching_bus(failed_ids={1})
+
+        failed = send_message_batch(bus, ["a", "b", "c"], "queue", "source")
+
+        assert [message for message, _ in failed] == ["b"]
+
+
+class TestPublishMessages:
+    """Tests for publish_messages"""
+
+    def test_returns_message_ids_of_sent_messages(self, batching_bus):
+        """Test that sent messages come back with the ID the queue assigned"""
+        bus = batching_bus(failed_ids={0})
+
+        sent, failed = publish_messages(bus, ["a", "b"], "queue", "source")
+
+        assert sent == [("b", "msg-1")]
+        assert [message for message, _ in failed] == ["a"]
+
+    def test_single_sends_return_message_ids(self):
+        """Test that the fallback path reports the MessageId of each send"""
+        bus = Mock()
+        bus.send_message = Mock(return_value={"MessageId": "single-1"})
+
+        sent, failed = publish_messages(bus, ["a"], "queue", "source")
+
+        assert sent == [("a", "single-1")]
+        assert failed == []
+
+    def test_concurrent_sends_keep_message_order(self, batching_bus):
+        """Test that batches sent from the thread pool are reported in order"""
+        bus = batching_bus(failed_ids={3})
+
+        sent, failed = publish_messages(bus, list(range(25)), "queue", "source", max_workers=4)
+
+        assert sorted(len(batch) for batch in bus.batches) == [5, 10, 10]
+        assert [message for message, _ in sent] == [m for m in range(25) if m not in (3, 13, 23)]
+        assert [message for message, _ in failed] == [3, 13, 23]
+
+    def test_raising_chunk_fails_only_its_messages(self, batching_bus):
+        """Test that a batch request that raises doesn't discard the other chunks"""
+        bus = batching_bus()
+        send_batch = bus.send_message_batch
+
+        def flaky_batch(messages, queue_name, source):
+            if messages[0] == 10:
+                raise ConnectionError("connection reset")
+            return send_batch(messages, queue_name, source)
+
+        bus.send_message_batch = flaky_batch
+
+        sent, failed = publish_messages(bus, list(range(25)), "queue", "source", max_workers=4)
+
+        assert [message for message, _ in sent] == list(range(10)) + list(range(20, 25))
+        assert [message for message, _ in failed] == list(range(10, 20))
+        assert all(isinstance(error, ConnectionError) for _, error in failed)
+
+    def test_unconfirmed_messages_reported_failed(self):
+        """Test that messages missing from the batch response are reported failed"""
+
+        class SilentBus:
+            def send_message_batch(self, messages, queue_name, source):
+                return {}
+
+        sent, failed = publish_messages(SilentBus(), ["a", "b"], "queue", "source")
+
+        assert sent == []
+        assert [message for message, _ in failed] == ["a", "b"]
+
+    def test_malformed_entry_fails_only_its_message(self):
+        """Test that an entry with a bad Id doesn't lose the rest of the chunk"""
+
+        class MalformedBus:
+            def send_message_batch(self, messages, queue_name, source):
+                return {"Successful": [
+                    {"Id": "0", "MessageId": "msg-0"},
+                    {"Id": "not-an-index", "MessageId": "msg-x"},
+                    {"Id": "7", "MessageId": "msg-7"},
+                ]}
+
+        sent, failed = publish_messages(MalformedBus(), ["a", "b"], "queue", "source")
+
+        assert sent == [("a", "msg-0")]
+        assert [message for message, _ in failed] == ["b"]
+
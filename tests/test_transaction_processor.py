@@ -1,16 +1,26 @@
 """
 Tests for the TransactionProcessor service
 """
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from unittest.mock import Mock, MagicMock, patch
 import pytest
-from app.transaction_processor import TransactionProcessor
-from app.models import Transaction, Inbox
+from solana.rpc.core import RPCException
+from solders.transaction_status import InstructionErrorFieldless, TransactionErrorInstructionError
+from sqlalchemy import delete, update
+from app.transaction_processor import INBOX_RETENTION_MIN_DAYS, TransactionProcessor
+from app.models import Transaction, Inbox, WalletKnownATA
 from app.database import db
 from mykobo_py.message_bus import PaymentPayload, StatusUpdatePayload, CorrectionPayload
 
 
+def _preflight_error(index, error):
+    """Build the RPCException of a preflight failure in the given instruction"""
+    return RPCException(Mock(data=Mock(err=TransactionErrorInstructionError(index, error))))
+
+
 class TestTransactionProcessor:
     """Tests for the TransactionProcessor service"""
 
@@ -166,6 +176,29 @@ class TestTransactionProcessor:
             net_amount = transaction.value - transaction.fee
             assert net_amount == Decimal("97.50")
 
+    def test_prepare_transfer_uses_exact_decimal_amount(self, processor, app):
+        """Test amounts that are inexact as floats convert to the exact smallest unit"""
+        with app.app_context():
+            transaction = Transaction(
+                id=str(uuid.uuid4()),
+                reference="MYK3333333334",
+                idempotency_key=str(uuid.uuid4()),
+                transaction_type="WITHDRAW",
+                status="APPROVED",
+                incoming_currency="EUR",
+                outgoing_currency="EURC",
+                value=Decimal("0.30"),
+                fee=Decimal("0.10"),
+                wallet_address="TestWallet",
+                source="ANCHOR_SOLANA",
+                instruction_type="Transaction",
+            )
+
+            transfer = processor._prepare_transfer(transaction)
+
+            # float(0.3 - 0.1) * 10**6 truncates to 199999
+            assert transfer['amount_in_smallest_unit'] == 200_000
+
     def test_get_token_mint_eurc(self, processor):
         """Test getting EURC token mint address"""
         mint_address = processor._get_token_mint("EURC")
@@ -181,6 +214,41 @@ class TestTransactionProcessor:
         with pytest.raises(ValueError, match="Unsupported currency"):
             processor._get_token_mint("INVALID")
 
+    def test_solana_context_built_once_by_concurrent_workers(self, processor):
+        """Test that transfer workers racing for the Solana context build it once"""
+        def build():
+            time.sleep(0.05)
+            processor._solana_client = Mock()
+
+        with patch.object(processor, '_build_solana_context', side_effect=build) as build_context:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                for _ in range(8):
+                    executor.submit(processor._ensure_solana_context)
+
+        build_context.assert_called_once()
+
+    def test_recent_blockhash_cached_until_stale(self, processor):
+        """Test that the blockhash is fetched once per TTL and again after invalidation"""
+        client = MagicMock()
+        client.get_latest_blockhash.return_value.value.blockhash = "hash-1"
+        processor._solana_client = client
+
+        with patch('app.transaction_processor.time.monotonic', return_value=100.0):
+            assert processor._recent_blockhash() == "hash-1"
+            assert processor._recent_blockhash() == "hash-1"
+        assert client.get_latest_blockhash.call_count == 1
+
+        # Past the TTL a new blockhash is fetched
+        client.get_latest_blockhash.return_value.value.blockhash = "hash-2"
+        with patch('app.transaction_processor.time.monotonic', return_value=100.0 + processor._blockhash_ttl + 1):
+            assert processor._recent_blockhash() == "hash-2"
+        assert client.get_latest_blockhash.call_count == 2
+
+        # A rejected blockhash is dropped straight away
+        processor._invalidate_blockhash()
+        processor._recent_blockhash()
+        assert client.get_latest_blockhash.call_count == 3
+
     def test_process_inbox_message_no_reference(self, processor, app):
         """Test processing message without reference"""
         with app.app_context():
@@ -194,9 +262,10 @@ class TestTransactionProcessor:
             db.session.commit()
 
             # Process message
-            processor._process_inbox_message(inbox_message)
+            processor._process_messages()
 
             # Should be marked as failed
+            db.session.refresh(inbox_message)
             assert inbox_message.status == "failed"
             assert "no reference" in inbox_message.last_error.lower()
 
@@ -216,9 +285,10 @@ class TestTransactionProcessor:
             db.session.commit()
 
             # Process message
-            processor._process_inbox_message(inbox_message)
+            processor._process_messages()
 
             # Should be marked as failed
+            db.session.refresh(inbox_message)
             assert inbox_message.status == "failed"
             assert "not found" in inbox_message.last_error.lower()
 
@@ -266,19 +336,21 @@ class TestTransactionProcessor:
                 }
 
                 # Process message
-                processor._process_inbox_message(inbox_message)
+                processor._process_messages()
 
                 # Verify Solana transaction was called with correct params
                 mock_solana.assert_called_once()
                 call_args = mock_solana.call_args[1]
                 assert call_args['recipient_address'] == "TestSolanaWallet123"
-                assert call_args['amount'] == float(Decimal("97.00"))  # 100 - 3
+                assert call_args['amount_in_smallest_unit'] == 97_000_000  # 100 - 3
                 assert call_args['currency'] == "EURC"
 
                 # Verify inbox message marked as completed
+                db.session.refresh(inbox_message)
                 assert inbox_message.status == "completed"
 
                 # Verify transaction status updated
+                db.session.refresh(transaction)
                 assert transaction.status == "COMPLETED"
 
     def test_process_inbox_message_batch(self, processor, app):
@@ -335,6 +407,426 @@ class TestTransactionProcessor:
                 completed_count = Inbox.query.filter_by(status="completed").count()
                 assert completed_count == 3
 
+    def test_batch_transfers_packed_into_shared_transactions(self, processor, app):
+        """Test that transfers are sent in groups when several fit in one Solana transaction"""
+        processor.max_transfers_per_tx = 2
+        with app.app_context():
+            for i in range(3):
+                reference = f"MYK300000000{i}"
+                db.session.add(Transaction(
+                    id=str(uuid.uuid4()),
+                    reference=reference,
+                    idempotency_key=str(uuid.uuid4()),
+                    transaction_type="WITHDRAW",
+                    status="PENDING_PAYEE",
+                    incoming_currency="EUR",
+                    outgoing_currency="EURC",
+                    value=Decimal("50.00"),
+                    fee=Decimal("1.00"),
+                    wallet_address=f"PackedWallet{i}",
+                    source="ANCHOR_SOLANA",
+                    instruction_type="Transaction",
+                ))
+                db.session.add(Inbox(
+                    message_id=str(uuid.uuid4()),
+                    message_body={"reference": reference, "status": "APPROVED"},
+                    transaction_reference=reference,
+                    status="pending"
+                ))
+            db.session.commit()
+
+            def send_group(transfers):
+                signature = f"sig_{transfers[0]['memo']}"
+                return [{"status": "success", "transaction_signature": signature} for _ in transfers]
+
+            with patch.object(processor, '_create_and_send_solana_transfers', side_effect=send_group) as mock_send:
+                processor._process_messages()
+
+            assert [len(call.args[0]) for call in mock_send.call_args_list] == [2, 1]
+            hashes = {tx.reference: tx.tx_hash for tx in Transaction.query.all()}
+            assert hashes == {
+                "MYK3000000000": "sig_MYK3000000000",
+                "MYK3000000001": "sig_MYK3000000000",
+                "MYK3000000002": "sig_MYK3000000002",
+            }
+            assert Inbox.query.filter_by(status="completed").count() == 3
+
+    def test_group_send_error_only_fails_its_group(self, processor, app):
+        """Test that a transfer group raising doesn't discard the other groups' results"""
+        processor.max_transfers_per_tx = 2
+        with app.app_context():
+            for i in range(3):
+                reference = f"MYK310000000{i}"
+                db.session.add(Transaction(
+                    id=str(uuid.uuid4()),
+                    reference=reference,
+                    idempotency_key=str(uuid.uuid4()),
+                    transaction_type="WITHDRAW",
+                    status="PENDING_PAYEE",
+                    incoming_currency="EUR",
+                    outgoing_currency="EURC",
+                    value=Decimal("50.00"),
+                    fee=Decimal("1.00"),
+                    wallet_address=f"GroupWallet{i}",
+                    source="ANCHOR_SOLANA",
+                    instruction_type="Transaction",
+                ))
+                db.session.add(Inbox(
+                    message_id=str(uuid.uuid4()),
+                    message_body={"reference": reference, "status": "APPROVED"},
+                    transaction_reference=reference,
+                    status="pending"
+                ))
+            db.session.commit()
+
+            def send_group(transfers):
+                if len(transfers) == 1:
+                    raise RuntimeError("could not sign")
+                return [{"status": "success", "transaction_signature": "sig_shared"} for _ in transfers]
+
+            with patch.object(processor, '_create_and_send_solana_transfers', side_effect=send_group):
+                processor._process_messages()
+
+            statuses = {tx.reference: tx.status for tx in Transaction.query.all()}
+            assert statuses == {
+                "MYK3100000000": "COMPLETED",
+                "MYK3100000001": "COMPLETED",
+                "MYK3100000002": "FAILED",
+            }
+            assert Inbox.query.filter_by(status="completed").count() == 2
+            assert Inbox.query.filter_by(status="failed").count() == 1
+
+    def test_repeat_recipient_skips_token_account_creation(self, processor, app):
+        """Test that a recipient paid before doesn't get its token account created again"""
+        with app.app_context():
+            for i in range(2):
+                reference = f"MYK200000000{i}"
+                db.session.add(Transaction(
+                    id=str(uuid.uuid4()),
+                    reference=reference,
+                    idempotency_key=str(uuid.uuid4()),
+                    transaction_type="WITHDRAW",
+                    status="PENDING_PAYEE",
+                    incoming_currency="EUR",
+                    outgoing_currency="EURC",
+                    value=Decimal("50.00"),
+                    fee=Decimal("1.00"),
+                    wallet_address="RepeatWallet",
+                    source="ANCHOR_SOLANA",
+                    instruction_type="Transaction",
+                ))
+                db.session.add(Inbox(
+                    message_id=str(uuid.uuid4()),
+                    message_body={"reference": reference, "status": "APPROVED"},
+                    transaction_reference=reference,
+                    status="pending"
+                ))
+                db.session.commit()
+
+                with patch.object(processor, '_create_and_send_solana_transaction') as mock_solana:
+                    mock_solana.return_value = {
+                        "status": "success",
+                        "transaction_signature": f"mock_sig_{i}"
+                    }
+
+                    processor._process_messages()
+
+                    # Only the first payout needs to create the token account
+                    assert mock_solana.call_args[1]['create_recipient_account'] is (i == 0)
+
+            known = WalletKnownATA.query.filter_by(wallet_address="RepeatWallet").all()
+            assert [row.mint for row in known] == [processor.eurc_mint]
+
+    def _seed_known_recipient_withdrawal(self, processor, reference, wallet_address):
+        """Add a withdrawal, its approval and a cached token account for its recipient"""
+        db.session.add(WalletKnownATA(wallet_address=wallet_address, mint=processor.eurc_mint))
+        db.session.add(Transaction(
+            id=str(uuid.uuid4()),
+            reference=reference,
+            idempotency_key=str(uuid.uuid4()),
+            transaction_type="WITHDRAW",
+            status="PENDING_PAYEE",
+            incoming_currency="EUR",
+            outgoing_currency="EURC",
+            value=Decimal("50.00"),
+            fee=Decimal("1.00"),
+            wallet_address=wallet_address,
+            source="ANCHOR_SOLANA",
+            instruction_type="Transaction",
+        ))
+        db.session.add(Inbox(
+            message_id=str(uuid.uuid4()),
+            message_body={"reference": reference, "status": "APPROVED"},
+            transaction_reference=reference,
+            status="pending"
+        ))
+        db.session.commit()
+
+    def test_closed_token_account_recreated_and_forgotten(self, processor, app):
+        """Test that a closed known token account is created again and dropped from the cache"""
+        with app.app_context():
+            self._seed_known_recipient_withdrawal(processor, "MYK2100000000", "ClosedWallet")
+
+            # The memo and transfer_checked instructions; the transfer fails
+            closed = _preflight_error(1, InstructionErrorFieldless.InvalidAccountData)
+            with patch.object(processor, '_ensure_solana_context'), \
+                    patch.object(processor, '_recent_blockhash'), \
+                    patch.object(processor, '_transfer_instructions', return_value=["memo", "transfer"]) as build, \
+                    patch.object(processor, '_send_instructions', side_effect=[closed, Mock(value="sig")]):
+                processor._process_messages()
+
+            assert [call.args[0]['create_recipient_account'] for call in build.call_args_list] == [False, True]
+            assert Transaction.query.filter_by(reference="MYK2100000000").first().status == "COMPLETED"
+            assert WalletKnownATA.query.filter_by(wallet_address="ClosedWallet").count() == 0
+
+    @pytest.mark.parametrize("error", [
+        RuntimeError("Transaction simulation failed: invalid account data for instruction 1"),
+        _preflight_error(0, InstructionErrorFieldless.InvalidAccountData),
+        _preflight_error(1, InstructionErrorFieldless.InsufficientFunds),
+    ], ids=["text_only", "other_instruction", "other_error"])
+    def test_unrelated_send_error_keeps_token_account(self, processor, app, error):
+        """Test that errors not pointing at a missing destination account aren't retried with a create"""
+        with app.app_context():
+            self._seed_known_recipient_withdrawal(processor, "MYK2200000000", "OpenWallet")
+
+            with patch.object(processor, '_ensure_solana_context'), \
+                    patch.object(processor, '_recent_blockhash'), \
+                    patch.object(processor, '_transfer_instructions', return_value=["memo", "transfer"]), \
+                    patch.object(processor, '_send_instructions', side_effect=error) as send:
+                processor._process_messages()
+
+            send.assert_called_once()
+            assert Transaction.query.filter_by(reference="MYK2200000000").first().status == "FAILED"
+            assert WalletKnownATA.query.filter_by(wallet_address="OpenWallet").count() == 1
+
+    def test_packed_closed_token_account_forgets_only_its_recipient(self, processor, app):
+        """Test that in a packed send only the transfer the error points at is forgotten"""
+        processor.max_transfers_per_tx = 2
+        with app.app_context():
+            self._seed_known_recipient_withdrawal(processor, "MYK2300000000", "PackedWallet0")
+            self._seed_known_recipient_withdrawal(processor, "MYK2300000001", "PackedWallet1")
+
+            # Two instructions per transfer: the second transfer_checked is instruction 3
+            closed = _preflight_error(3, InstructionErrorFieldless.InvalidAccountData)
+            with patch.object(processor, '_ensure_solana_context'), \
+                    patch.object(processor, '_recent_blockhash'), \
+                    patch.object(processor, '_sign_transaction', return_value=b"small"), \
+                    patch.object(processor, '_transfer_instructions', return_value=["memo", "transfer"]), \
+                    patch.object(processor, '_send_instructions', side_effect=[closed, Mock(value="sig")]) as send:
+                processor._process_messages()
+
+            assert send.call_count == 2
+            assert {tx.status for tx in Transaction.query.all()} == {"COMPLETED"}
+            assert [row.wallet_address for row in WalletKnownATA.query.all()] == ["PackedWallet0"]
+
+    def test_duplicate_reference_in_batch_sent_once(self, processor, app):
+        """Test that a second message for an in-flight transfer is deferred to the next poll"""
+        with app.app_context():
+            transaction = Transaction(
+                id=str(uuid.uuid4()),
+                reference="MYK5555555555",
+                idempotency_key=str(uuid.uuid4()),
+                transaction_type="WITHDRAW",
+                status="PENDING_PAYEE",
+                incoming_currency="EUR",
+                outgoing_currency="EURC",
+                value=Decimal("50.00"),
+                fee=Decimal("1.00"),
+                wallet_address="DuplicateWallet",
+                source="ANCHOR_SOLANA",
+                instruction_type="Transaction",
+            )
+            db.session.add(transaction)
+
+            for i in range(2):
+                db.session.add(Inbox(
+                    message_id=f"msg-duplicate-{i}",
+                    message_body={
+                        "reference": "MYK5555555555",
+                        "status": "APPROVED"
+                    },
+                    transaction_reference="MYK5555555555",
+                    status="pending"
+                ))
+            db.session.commit()
+
+            with patch.object(processor, '_create_and_send_solana_transaction') as mock_solana:
+                mock_solana.return_value = {
+                    "status": "success",
+                    "transaction_signature": "mock_sig"
+                }
+
+                processor._process_messages()
+                mock_solana.assert_called_once()
+                assert Inbox.query.filter_by(message_id="msg-duplicate-1").first().status == "pending"
+
+                # The deferred message sees the completed transaction on the next poll
+                processor._process_messages()
+                mock_solana.assert_called_once()
+                assert Inbox.query.filter_by(status="completed").count() == 2
+
+    def test_failed_commit_after_send_does_not_pay_again(self, processor, app, monkeypatch):
+        """Test that a transfer whose outcome can't be committed is not sent again"""
+        with app.app_context():
+            db.session.add(Transaction(
+                id=str(uuid.uuid4()),
+                reference="MYK6666666666",
+                idempotency_key=str(uuid.uuid4()),
+                transaction_type="WITHDRAW",
+                status="PENDING_PAYEE",
+                incoming_currency="EUR",
+                outgoing_currency="EURC",
+                value=Decimal("50.00"),
+                fee=Decimal("1.00"),
+                wallet_address="CrashWallet",
+                source="ANCHOR_SOLANA",
+                instruction_type="Transaction",
+            ))
+            db.session.add(Inbox(
+                message_id="msg-crash-0",
+                message_body={"reference": "MYK6666666666", "status": "APPROVED"},
+                transaction_reference="MYK6666666666",
+                status="pending"
+            ))
+            db.session.commit()
+
+            with patch.object(processor, '_create_and_send_solana_transaction') as mock_solana:
+                mock_solana.return_value = {
+                    "status": "success",
+                    "transaction_signature": "mock_sig"
+                }
+
+                # Every commit after the transfer went out fails
+                commit = db.session.commit
+
+                def failing_commit():
+                    if mock_solana.called:
+                        raise RuntimeError("database went away")
+                    commit()
+
+                monkeypatch.setattr(db.session, 'commit', failing_commit)
+                processor._process_messages()
+                monkeypatch.undo()
+                mock_solana.assert_called_once()
+
+                # A redelivery of the approval finds the transaction already reserved
+                db.session.add(Inbox(
+                    message_id="msg-crash-1",
+                    message_body={"reference": "MYK6666666666", "status": "APPROVED"},
+                    transaction_reference="MYK6666666666",
+                    status="pending"
+                ))
+                db.session.commit()
+                processor._process_messages()
+
+                mock_solana.assert_called_once()
+                assert Transaction.query.filter_by(reference="MYK6666666666").one().status == "PROCESSING"
+                assert Inbox.query.filter_by(message_id="msg-crash-0").one().status == "processing"
+
+    def test_transaction_reserved_by_another_worker_not_sent(self, processor, app):
+        """Test that a transaction another worker reserved first is not paid again"""
+        with app.app_context():
+            db.session.add(Transaction(
+                id=str(uuid.uuid4()),
+                reference="MYK7777777777",
+                idempotency_key=str(uuid.uuid4()),
+                transaction_type="WITHDRAW",
+                status="PENDING_PAYEE",
+                incoming_currency="EUR",
+                outgoing_currency="EURC",
+                value=Decimal("50.00"),
+                fee=Decimal("1.00"),
+                wallet_address="RaceWallet",
+                source="ANCHOR_SOLANA",
+                instruction_type="Transaction",
+            ))
+            db.session.add(Inbox(
+                message_id="msg-race-0",
+                message_body={"reference": "MYK7777777777", "status": "APPROVED"},
+                transaction_reference="MYK7777777777",
+                status="pending"
+            ))
+            db.session.commit()
+
+            fetch = processor._fetch_transactions_for_batch
+
+            def fetch_then_lose_race(inbox_messages):
+                transactions = fetch(inbox_messages)
+                # Another worker, holding a different message for the same
+                # reference, reserves the transaction after this one loaded it
+                db.session.execute(
+                    update(Transaction)
+                    .where(Transaction.reference == "MYK7777777777")
+                    .values(status="PROCESSING")
+                    .execution_options(synchronize_session=False)
+                )
+                return transactions
+
+            with patch.object(processor, '_fetch_transactions_for_batch', side_effect=fetch_then_lose_race), \
+                    patch.object(processor, '_create_and_send_solana_transaction') as mock_solana:
+                processor._process_messages()
+
+            mock_solana.assert_not_called()
+            assert Inbox.query.filter_by(message_id="msg-race-0").one().status == "completed"
+            assert Transaction.query.filter_by(reference="MYK7777777777").one().status == "PROCESSING"
+
+    def test_redelivery_after_purge_does_not_pay_again(self, processor, app):
+        """Test that messages redelivered after their inbox rows were purged don't reopen a payout"""
+        with app.app_context():
+            db.session.add(Transaction(
+                id=str(uuid.uuid4()),
+                reference="MYK4200000000",
+                idempotency_key=str(uuid.uuid4()),
+                transaction_type="DEPOSIT",
+                status="PENDING_ANCHOR",
+                incoming_currency="EUR",
+                outgoing_currency="EURC",
+                value=Decimal("50.00"),
+                fee=Decimal("1.00"),
+                wallet_address="PurgedWallet",
+                source="ANCHOR_SOLANA",
+                instruction_type="Transaction",
+            ))
+            db.session.add(Inbox(
+                message_id="msg-purged-approval",
+                message_body={"reference": "MYK4200000000", "status": "APPROVED"},
+                transaction_reference="MYK4200000000",
+                status="pending"
+            ))
+            db.session.commit()
+
+            with patch.object(processor, '_create_and_send_solana_transaction') as mock_solana:
+                mock_solana.return_value = {"status": "success", "transaction_signature": "sig_once"}
+                processor._process_messages()
+
+                db.session.execute(delete(Inbox))
+                for status in ("FUNDS_RECEIVED", "APPROVED"):
+                    Inbox.insert_if_new(
+                        f"msg-purged-{status}", {"reference": "MYK4200000000", "status": status}
+                    )
+                    db.session.commit()
+                    processor._process_messages()
+
+                mock_solana.assert_called_once()
+            assert Transaction.query.filter_by(reference="MYK4200000000").first().status == "COMPLETED"
+            assert Inbox.query.filter_by(status="completed").count() == 2
+
+    def test_inbox_retention_has_a_floor(self, app):
+        """Test that a retention shorter than the redelivery window is raised"""
+        app.config["INBOX_RETENTION_DAYS"] = 1
+        processor = TransactionProcessor(app)
+
+        assert processor.inbox_retention_days == INBOX_RETENTION_MIN_DAYS
+
+    def test_inbox_listener_is_a_no_op_without_postgresql(self, processor, app):
+        """Test that SQLite gets no LISTEN connection and waits a full poll interval"""
+        processor._open_inbox_listener()
+
+        assert processor._inbox_listener is None
+        with patch('app.transaction_processor.time.sleep') as sleep:
+            processor._wait_for_messages()
+        sleep.assert_called_once_with(processor.poll_interval)
+
     def test_stop_processor(self, processor):
         """Test stopping the processor"""
         processor.running = True
@@ -486,6 +978,60 @@ class TestTransactionProcessor:
             assert message["payload"]["value"] == "97.5"  # 100 - 2.50
             assert message["payload"]["source"] == "CHAIN_SOLANA"
 
+    def test_service_token_reused_across_status_updates(self, processor, app, mock_message_bus, mock_identity_service):
+        """Test that one service token is acquired for several status updates"""
+        with app.app_context():
+            for reference in ("MYK1212121212", "MYK3434343434"):
+                processor._send_status_update(
+                    StatusUpdatePayload(reference=reference, status="FAILED", message="test"),
+                    reference
+                )
+
+            assert mock_message_bus.send_message.call_count == 2
+            mock_identity_service.acquire_token.assert_called_once()
+
+            # A failed send drops the cached token
+            mock_message_bus.send_message.side_effect = Exception("Access denied")
+            processor._send_status_update(
+                StatusUpdatePayload(reference="MYK5656565656", status="FAILED", message="test"),
+                "MYK5656565656"
+            )
+            mock_message_bus.send_message.side_effect = None
+            processor._send_status_update(
+                StatusUpdatePayload(reference="MYK7878787878", status="FAILED", message="test"),
+                "MYK7878787878"
+            )
+
+            assert mock_identity_service.acquire_token.call_count == 2
+
+    def test_flush_retry_uses_fresh_service_token(self, processor, app, mock_message_bus, mock_identity_service):
+        """Test that a queued message retried after a failed send carries a new token"""
+        stale, fresh = Mock(token="stale-token"), Mock(token="fresh-token")
+        mock_identity_service.acquire_token.side_effect = [stale, fresh]
+        with app.app_context():
+            outbox = []
+            processor._send_status_update(
+                StatusUpdatePayload(reference="MYK9090909090", status="FAILED", message="test"),
+                "MYK9090909090",
+                outbox
+            )
+            mock_message_bus.send_message.side_effect = [Exception("Access denied"), {"MessageId": "retried"}]
+
+            processor._flush_status_updates(outbox)
+
+            tokens = [call.args[0].to_dict()["meta_data"]["token"] for call in mock_message_bus.send_message.call_args_list]
+            assert tokens == ["stale-token", "fresh-token"]
+            retried = mock_message_bus.send_message.call_args.args[0].to_dict()
+            assert retried["meta_data"]["idempotency_key"] == "MYK9090909090-status-FAILED"
+
+    def test_service_token_lifetime_from_expires_in(self, processor, mock_identity_service):
+        """Test that a token's expires_in is preferred over the default TTL"""
+        mock_identity_service.acquire_token.return_value.expires_in = 3600
+        with patch('app.transaction_processor.time.monotonic', return_value=1000.0):
+            processor._get_service_token()
+
+        assert processor._service_token_expiry == 1000.0 + 3600 - processor._service_token_refresh_margin
+
     def test_status_update_on_successful_transaction(self, processor, app, mock_message_bus):
         """Test that payment message is sent when Solana transaction succeeds"""
         with app.app_context():
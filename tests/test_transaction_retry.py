@@ -12,6 +12,7 @@ from app.transaction_retry import (
     get_failed_transactions_by_status,
     retry_transaction,
     retry_unsent_transactions,
+    has_unsent_transactions,
     get_transaction_stats
 )
 from app.models import Transaction
@@ -328,12 +329,85 @@ class TestTransactionRetry:
             assert results['total'] == 3
             assert results['succeeded'] == 3
             assert results['failed'] == 0
-            assert len(results['results']) == 3
+            assert len(results['success_ids']) == 3
+            assert results['failed_details'] == []
 
             # Verify all have message_id now
-            for result in results['results']:
-                assert result['success'] is True
-                assert result['message_id'] is not None
+            for transaction_id in results['success_ids']:
+                assert db.session.get(Transaction, transaction_id).message_id is not None
+
+            # One service token is shared by the whole run
+            mock_identity_service.acquire_token.assert_called_once()
+
+    def test_retry_unsent_transactions_batched_send(self, app, mock_identity_service, batching_bus):
+        """Test that unsent transactions go out in one batch and failed entries stay unsent"""
+        with app.app_context():
+            bus = batching_bus(failed_ids={1})
+            app.config["IDENTITY_SERVICE_CLIENT"] = mock_identity_service
+            app.config["MESSAGE_BUS"] = bus
+            app.config["TRANSACTION_QUEUE_NAME"] = "test-queue"
+
+            for i in range(2):
+                db.session.add(Transaction(
+                    id=str(uuid.uuid4()),
+                    reference=f"BATCHSEND{i:03d}",
+                    idempotency_key=str(uuid.uuid4()),
+                    transaction_type="WITHDRAW",
+                    first_name="John",
+                    last_name="Smith",
+                    status="PENDING_PAYEE",
+                    incoming_currency="EUR",
+                    outgoing_currency="EURC",
+                    value=Decimal("100.00"),
+                    fee=Decimal("2.50"),
+                    wallet_address=f"BatchSendWallet{i}",
+                    source="ANCHOR_SOLANA",
+                    instruction_type="Transaction",
+                    message_id=None,
+                    created_at=datetime(2025, 1, 1, 12, i)
+                ))
+            db.session.commit()
+
+            results = retry_unsent_transactions(limit=100)
+
+            assert len(bus.batches) == 1
+            assert results['succeeded'] == 1
+            assert results['failed'] == 1
+            assert results['failed_details'][0]['reference'] == "BATCHSEND001"
+            assert results['failed_details'][0]['error'] == "try again"
+
+            sent = Transaction.query.filter_by(reference="BATCHSEND000").one()
+            assert sent.message_id == "msg-0"
+            assert sent.queue_sent_at is not None
+            assert Transaction.query.filter_by(reference="BATCHSEND001").one().message_id is None
+
+    def test_has_unsent_transactions(self, app):
+        """Test the cheap existence check used to skip idle retry cycles"""
+        with app.app_context():
+            assert has_unsent_transactions() is False
+
+            tx = Transaction(
+                id=str(uuid.uuid4()),
+                reference="EXISTS001",
+                idempotency_key=str(uuid.uuid4()),
+                transaction_type="WITHDRAWAL",
+                status="pending_payee",
+                incoming_currency="EUR",
+                outgoing_currency="EURC",
+                value=Decimal("10.00"),
+                fee=Decimal("0.50"),
+                wallet_address="ExistsWallet",
+                source="ANCHOR_SOLANA",
+                instruction_type="Transaction",
+                message_id="sent-exists"
+            )
+            db.session.add(tx)
+            db.session.commit()
+            assert has_unsent_transactions() is False
+
+            tx.message_id = None
+            db.session.commit()
+            assert has_unsent_transactions() is True
 
     def test_get_transaction_stats(self, app):
         """Test getting transaction statistics"""